@@ -2,94 +2,499 @@
 Authentication Module
 Handles JWT tokens, password hashing, and user verification
 """
-from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+import bcrypt
+import jwt
+import orjson
+import xxhash
+from aiodataloader import DataLoader
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
+from jwt.exceptions import ExpiredSignatureError, InvalidTokenError as JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.config import settings
-from app.database import get_db, Database
+from app.config import ALGORITHM, settings
+from app.database import db, Database, register_query
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# New passwords are hashed with Argon2id (memory-hard, vectorised Blake2b rounds).
+# bcrypt hashes are still verified and upgraded on the next successful login:
+#   - "$sha256$2b$..." = bcrypt(base64(sha256(password)))
+#   - "$2b$..."        = legacy plain bcrypt(password)
+_password_hasher = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+_ARGON2_PREFIX = "$argon2"
+_PREHASH_PREFIX = "$sha256"
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# detail/headers of the 401 raised for every auth failure. Only these are
+# shared - each failure raises its own HTTPException, because an exception
+# instance carries per-raise state (__traceback__, __context__) and sharing
+# one across concurrent requests would pin frames and race between tasks.
+_CREDENTIALS_DETAIL = "Could not validate credentials"
+_CREDENTIALS_HEADERS = {"WWW-Authenticate": "Bearer"}
+
+# Short-lived cache of password verify results.
+# Keyed by (hashed_password, sha256(plain_password)) - the plaintext is never stored.
+# Repeat logins within the TTL skip the ~250ms KDF entirely.
+_VERIFY_CACHE_TTL_SECONDS = 60
+_verify_cache: TTLCache = TTLCache(maxsize=4096, ttl=_VERIFY_CACHE_TTL_SECONDS)
+_verify_cache_lock = threading.Lock()
+
+# Auth queries - select only the columns each path needs (see
+# migrations/001_promo_users_email_active_idx.sql for the matching index).
+#
+# These are deliberately NOT held as asyncpg PreparedStatement objects on the
+# Database instance: a PreparedStatement belongs to the single connection that
+# created it, while every query here runs on whichever pooled connection is
+# free. asyncpg already prepares each distinct SQL text once per connection
+# (statement LRU cache), so reusing these exact constants means Postgres only
+# parses/plans them on first use per connection - after that it is bind+execute.
+# The batch user lookup is registered as a named query (db.fetch_prepared).
+_USERS_BY_EMAIL_SQL = """
+    SELECT id, email, name, role, last_login, created_at
+    FROM promo_users
+    WHERE email = ANY($1::text[]) AND is_active = TRUE
+"""
+_LOGIN_USER_SQL = """
+    SELECT id, email, name, role, password_hash
+    FROM promo_users
+    WHERE email = $1 AND is_active = TRUE
+"""
+_USERS_BY_EMAIL_QUERY = register_query("auth.users_by_email", _USERS_BY_EMAIL_SQL)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+# Per-token caches for get_current_user, which runs on every authenticated request.
+# The same 24h token is presented thousands of times, so a hit skips the HMAC
+# verify + JSON parse (payload cache) and the promo_users round-trip (user cache).
+_payload_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+_token_cache_lock = threading.RLock()
 
+# JWT settings bound once at import - plain module globals on the per-request path
+_SECRET_KEY = settings.SECRET_KEY
+_ALGORITHM = ALGORITHM
+_DEFAULT_EXPIRY_SECONDS = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+# JWT IDs of tokens revoked in this process -> the token's 'exp' (see
+# revoke_token). A plain dict rather than a size-capped cache: evicting an
+# entry early would quietly un-revoke a live token. Expired entries are
+# pruned on insert, so it only ever holds still-valid revoked tokens.
+_revoked_jtis: Dict[str, float] = {}
 
+# Dedicated pool for password hashing so KDF work never runs on the event loop
+# and never starves the default executor used for other blocking I/O.
+# argon2-cffi and bcrypt release the GIL, so throughput scales up to the core count.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="pwhash"
+)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+
+def _prehash(password: str) -> bytes:
+    """Fixed-size (44 byte) ASCII digest of the password, as fed to bcrypt"""
+    return base64.b64encode(hashlib.sha256(password.encode("utf-8")).digest())
+
+
+def _check_password(plain_password: str, hashed_password: str) -> bool:
+    """Check a password against a stored hash (Argon2id, pre-hashed or legacy bcrypt)"""
+    try:
+        if hashed_password.startswith(_ARGON2_PREFIX):
+            return _password_hasher.verify(hashed_password, plain_password)
+        if hashed_password.startswith(_PREHASH_PREFIX):
+            return bcrypt.checkpw(
+                _prehash(plain_password),
+                hashed_password[len(_PREHASH_PREFIX):].encode("utf-8")
+            )
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    except (VerificationError, InvalidHashError):
+        return False
+    except ValueError:
+        # Malformed hash in the database - treat as a failed login, not a 500
+        return False
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if a stored hash is not Argon2id or uses different cost parameters"""
+    if not hashed_password.startswith(_ARGON2_PREFIX):
+        return True
+    try:
+        return _password_hasher.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return True
+
+
+async def _verify_cached(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password, reusing a recent result for the same hash/password pair"""
+    pw_sha = hashlib.sha256(plain_password.encode("utf-8")).digest()
+    key = (hashed_password, pw_sha)
+
+    with _verify_cache_lock:
+        entry = _verify_cache.get(key)
+    # Entries store the digest they were created for; confirm it in constant time
+    if entry is not None and hmac.compare_digest(entry[0], pw_sha):
+        return entry[1]
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        _hash_executor, _check_password, plain_password, hashed_password
+    )
+
+    with _verify_cache_lock:
+        _verify_cache[key] = (pw_sha, result)
+    return result
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (runs the KDF off the event loop)"""
+    return await _verify_cached(plain_password, hashed_password)
+
+
+async def get_password_hash(password: str) -> str:
+    """Hash a password with Argon2id (runs the KDF off the event loop)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _password_hasher.hash, password)
+
+
+def create_access_token(*, sub: str, expires_delta: Optional[timedelta] = None, **extra_claims) -> str:
     """
     Create a JWT access token
 
     Args:
-        data: Dictionary with user data (must include 'sub' key with user email)
+        sub: Subject claim (user email)
         expires_delta: Optional expiration time delta
+        **extra_claims: Additional claims. Login packs 'uid' and 'role' so
+                        get_current_user can answer from the token alone
+                        without a database round-trip.
 
     Returns:
-        JWT token string
+        JWT token string (carries a random 'jti' so it can be revoked)
+    """
+    # 'exp' as int epoch seconds (RFC 7519 NumericDate) - no datetime arithmetic
+    expires_seconds = int(expires_delta.total_seconds()) if expires_delta else _DEFAULT_EXPIRY_SECONDS
+    payload = {
+        "sub": sub,
+        **extra_claims,
+        "exp": int(time.time()) + expires_seconds,
+        "jti": secrets.token_urlsafe(12),
+    }
+
+    if _hs256 is not None:
+        return _hs256.encode(payload)
+    return jwt.encode(payload, _SECRET_KEY, algorithm=_ALGORITHM)
+
+
+def revoke_token(jti: str, exp: Optional[float] = None) -> None:
+    """
+    Revoke a token by its 'jti' claim until the token's 'exp'
+
+    Claim-based auth never re-reads promo_users, so this is the way to cut off
+    a token before it expires. The registry is per-process and in-memory;
+    once 'exp' has passed the token is rejected anyway, so the entry is
+    dropped by the next revoke.
+
+    Args:
+        jti: The token's 'jti' claim
+        exp: The token's 'exp' (epoch seconds); defaults to the longest
+            lifetime a token issued now could have
+    """
+    now = time.time()
+    with _token_cache_lock:
+        for expired in [key for key, until in _revoked_jtis.items() if until <= now]:
+            del _revoked_jtis[expired]
+        _revoked_jtis[jti] = exp if exp is not None else now + _DEFAULT_EXPIRY_SECONDS
+
+
+def logout_token(token: str) -> None:
+    """
+    Log a bearer token out of this process
+
+    Revokes its 'jti' and drops the token's cached payload plus the cached
+    user row for its subject, so neither outlives the logout by a TTL.
+
+    Raises:
+        HTTPException: 401 if the token is invalid, expired or already revoked
+    """
+    payload = _validated_payload(token)
+
+    if payload.get("jti") is not None:
+        revoke_token(payload["jti"], payload.get("exp"))
+
+    with _token_cache_lock:
+        _payload_cache.pop(_token_cache_key(token.encode("utf-8")), None)
+        _user_cache.pop(payload["sub"], None)
+
+
+def _b64url_encode(data: bytes) -> str:
+    """Encode bytes as an unpadded base64url JWT segment"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode(segment: str) -> bytes:
+    """Decode an unpadded base64url JWT segment"""
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class _HS256Codec:
+    """
+    Minimal HS256-only JWT encoder/verifier for the auth hot paths
+
+    Initialising an HMAC-SHA256 context costs two SHA-256 block operations for
+    key padding. The keyed context is primed once here and .copy()'d per token,
+    so each sign/verify only hashes the token itself. JSON goes through orjson,
+    and tokens carrying our own header (the common case) skip the header parse.
+
+    Output is byte-for-byte what PyJWT produces for the same claims (compact
+    JSON, header {"alg":"HS256","typ":"JWT"}), so either side can read the other.
+
+    verify() checks: 3 segments, alg == HS256, signature (constant-time), exp
+    present and in the future. Anything else falls out as JWTError.
+    """
+
+    def __init__(self, secret: str):
+        self._base = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+        self._known_header = _b64url_encode(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
+
+    def _sign(self, signing_input: str) -> bytes:
+        ctx = self._base.copy()
+        ctx.update(signing_input.encode("ascii"))
+        return ctx.digest()
+
+    def encode(self, claims: dict) -> str:
+        signing_input = f"{self._known_header}.{_b64url_encode(orjson.dumps(claims))}"
+        return f"{signing_input}.{_b64url_encode(self._sign(signing_input))}"
+
+    def verify(self, token: str) -> dict:
+        parts = token.split(".")
+        if len(parts) != 3:
+            raise JWTError("Not enough segments")
+        header_b64, payload_b64, signature_b64 = parts
+
+        try:
+            if header_b64 != self._known_header:
+                header = orjson.loads(_b64url_decode(header_b64))
+                if not isinstance(header, dict) or header.get("alg") != "HS256":
+                    raise JWTError("The specified alg value is not allowed")
+
+            signature = self._sign(f"{header_b64}.{payload_b64}")
+            if not hmac.compare_digest(signature, _b64url_decode(signature_b64)):
+                raise JWTError("Signature verification failed")
+
+            payload = orjson.loads(_b64url_decode(payload_b64))
+        except ValueError as e:
+            # binascii.Error, orjson.JSONDecodeError and UnicodeError are all ValueErrors
+            raise JWTError(f"Invalid token: {e}") from None
+
+        if not isinstance(payload, dict):
+            raise JWTError("Invalid payload")
+
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)) or isinstance(exp, bool):
+            raise JWTError("Token is missing a valid 'exp' claim")
+        if exp <= time.time():
+            raise ExpiredSignatureError("Signature has expired")
+
+        return payload
+
+
+# HS256 (the configured default) takes the primed-HMAC/orjson fast path; any
+# other algorithm goes through PyJWT.
+_hs256: Optional[_HS256Codec] = _HS256Codec(_SECRET_KEY) if _ALGORITHM == "HS256" else None
+
+
+def _token_cache_key(token: bytes) -> int:
     """
-    to_encode = data.copy()
+    Cache key for a bearer token: 64-bit xxh3 fingerprint
+
+    xxh3 (C extension) is several times faster than blake2b here. Numba was
+    considered and rejected - its first-import JIT compile (~30s) and call
+    dispatch overhead don't pay off for one tiny hash per request.
+
+    xxh3 is not collision resistant, so the key only selects the cache slot;
+    a hit is confirmed against the full token (see _decode_token).
+    """
+    return xxhash.xxh3_64_intdigest(token)
+
 
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+def _decode_token(token: str) -> dict:
+    """
+    Decode and verify a JWT, reusing a recently decoded payload for the same token.
+
+    Cached payloads are still checked against their 'exp' claim, so an expired
+    token is rejected even if it is still in the cache.
+
+    Raises:
+        JWTError: If the token is invalid or expired
+    """
+    token_bytes = token.encode("utf-8")
+    key = _token_cache_key(token_bytes)
+
+    with _token_cache_lock:
+        entry = _payload_cache.get(key)
+
+    # Entries store the token they were created for; confirm it in constant
+    # time so a crafted xxh3 collision can never return someone else's payload
+    payload = entry[1] if entry is not None and hmac.compare_digest(entry[0], token_bytes) else None
+
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            return payload
+        with _token_cache_lock:
+            _payload_cache.pop(key, None)
+        raise JWTError("Signature has expired")
+
+    if _hs256 is not None:
+        payload = _hs256.verify(token)
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        payload = jwt.decode(token, _SECRET_KEY, algorithms=[_ALGORITHM])
+
+    with _token_cache_lock:
+        _payload_cache[key] = (token_bytes, payload)
+    return payload
+
+
+async def _load_users_by_email(emails: List[str]) -> list:
+    """DataLoader batch function: one query for every email requested this tick"""
+    rows = await db.fetch_prepared(_USERS_BY_EMAIL_QUERY, emails)
+    by_email = {row['email']: row for row in rows}
+    return [by_email.get(email) for email in emails]
+
+
+_user_loader: Optional[DataLoader] = None
+
+
+def _get_user_loader() -> DataLoader:
+    """
+    Process-wide user loader, created lazily inside the running event loop
+
+    Concurrent lookups scheduled in the same loop tick (across requests) are
+    coalesced into one `email = ANY($1)` query, with duplicates collapsed.
+    cache=False: each tick goes back to Postgres, so one request never sees a
+    row memoised for another - TTL caching stays with _user_cache.
+    """
+    global _user_loader
+    if _user_loader is None:
+        _user_loader = DataLoader(batch_load_fn=_load_users_by_email, cache=False)
+    return _user_loader
+
+
+async def _fetch_user(email: str):
+    """Load an active user by email, reusing a recently fetched row"""
+    with _token_cache_lock:
+        user = _user_cache.get(email)
+    if user is not None:
+        return user
+
+    user = await _get_user_loader().load(email)
+
+    # Only cache hits - a missing/inactive user must be re-checked next time
+    if user is not None:
+        with _token_cache_lock:
+            _user_cache[email] = user
+    return user
+
+
+def _credentials_exception() -> HTTPException:
+    """A fresh 401 exception for an auth failure, ready to raise"""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=_CREDENTIALS_DETAIL,
+        headers=_CREDENTIALS_HEADERS,
+    )
 
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-    return encoded_jwt
+def _validated_payload(token: str) -> dict:
+    """
+    Decode a bearer token and check it carries a subject and is not revoked
+
+    Raises:
+        HTTPException: 401 if the token is invalid, expired or revoked
+    """
+    try:
+        payload = _decode_token(token)
+    except JWTError:
+        raise _credentials_exception()
+
+    if payload.get("sub") is None or payload.get("jti") in _revoked_jtis:
+        raise _credentials_exception()
+
+    return payload
 
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Database = Depends(get_db)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """
     FastAPI dependency to get current authenticated user
 
+    Tokens issued at login carry uid/role claims, so the user is built from the
+    (cached) token payload without touching Postgres. Older tokens without
+    those claims fall back to a lookup through the 30s user cache.
+
+    Use get_current_user_fresh when the endpoint needs up-to-date DB state.
+
+    Uses the process-wide db singleton directly rather than Depends(get_db),
+    so FastAPI doesn't resolve an extra dependency on every request.
+
     Raises:
         HTTPException: If token is invalid or user not found
 
     Returns:
-        User record from database
+        Dict with id, email and role (or the full user record for legacy tokens)
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    payload = _validated_payload(credentials.credentials)
+    email: str = payload["sub"]
 
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
+    if "uid" in payload:
+        return {"id": payload["uid"], "email": email, "role": payload.get("role")}
 
-        if email is None:
-            raise credentials_exception
+    # Legacy token without claims - get user from database (or the user cache)
+    user = await _fetch_user(email)
 
-    except JWTError:
-        raise credentials_exception
+    if user is None:
+        raise _credentials_exception()
 
-    # Get user from database
-    user = await db.fetchrow(
-        "SELECT * FROM promo_users WHERE email = $1 AND is_active = TRUE",
-        email
-    )
+    return user
+
+
+async def get_current_user_fresh(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    FastAPI dependency returning the current user's row straight from Postgres
+
+    Bypasses the user cache, so deactivation and profile changes are seen
+    immediately.
+
+    Raises:
+        HTTPException: If token is invalid or user not found / inactive
+
+    Returns:
+        User record from database
+    """
+    payload = _validated_payload(credentials.credentials)
+
+    user = await _get_user_loader().load(payload["sub"])
 
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
 
@@ -106,15 +511,24 @@ async def authenticate_user(email: str, password: str, db: Database) -> Optional
     Returns:
         User record if authentication successful, None otherwise
     """
-    user = await db.fetchrow(
-        "SELECT * FROM promo_users WHERE email = $1 AND is_active = TRUE",
-        email
-    )
+    user = await db.fetchrow(_LOGIN_USER_SQL, email)
 
     if not user:
         return None
 
-    if not verify_password(password, user['password_hash']):
+    if not await verify_password(password, user['password_hash']):
         return None
 
+    # Lazy migration to the current hash scheme/cost - never fails the login
+    if password_needs_rehash(user['password_hash']):
+        try:
+            await db.execute(
+                "UPDATE promo_users SET password_hash = $1 WHERE id = $2",
+                await get_password_hash(password),
+                user['id']
+            )
+            logger.info(f"🔐 Password hash upgraded for user {user['id']}")
+        except Exception as e:
+            logger.warning(f"⚠️ Password hash upgrade failed for user {user['id']}: {e}")
+
     return dict(user)
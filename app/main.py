@@ -4,27 +4,48 @@ Main application entry point with authentication and core endpoints
 Created: October 16, 2025
 Updated: October 17, 2025 - Added rate limiting
 """
-from fastapi import FastAPI, HTTPException, Depends, status, Request, APIRouter
+from fastapi import FastAPI, HTTPException, Depends, status, Request, APIRouter, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
+from fastapi.security import HTTPAuthorizationCredentials
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+from html import escape
 from pathlib import Path
+from string import Template
+import asyncio
+import base64
+import bisect
+from hashlib import blake2b
+import itertools
 import logging
+import random
+import secrets
+import time
+import asyncpg
+import orjson
+from cachetools import LRUCache, TTLCache
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 # Internal imports
 from app.config import settings
-from app.database import db, get_db, Database
+from app.database import (
+    db, get_db, get_db_conn, Database, BatchWriter, CopyBatchWriter, records_to_json, to_json
+)
 from app.auth import (
     authenticate_user,
     create_access_token,
     get_current_user,
-    get_password_hash
+    get_current_user_fresh,
+    get_password_hash,
+    logout_token,
+    security
 )
-from app.ollama_service import OllamaService
+from app.ollama_service import OllamaService, OllamaOverloadedError
 from app.models import (
     LoginRequest,
     TokenResponse,
@@ -52,12 +73,230 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# The log format never prints thread/process fields - skip collecting them
+# for every LogRecord
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+# Per-query timeouts (seconds). Newsletter/health queries are simple indexed
+# lookups on the send path - a stalled one should fail fast (the newsletter
+# system then skips the promo) instead of holding a pooled connection for
+# the pool's 60s command_timeout. Analytics aggregations get more room.
+NEWSLETTER_QUERY_TIMEOUT = 2.0
+ANALYTICS_QUERY_TIMEOUT = 30.0
+
+# Sent with the "no offers available" 503s: that state lasts minutes, so the
+# newsletter client and any proxy in between can back off for 10 seconds
+# instead of retrying straight away. Not used on error 503s (those may clear
+# on the very next request).
+NO_OFFERS_RETRY_HEADERS = {"Cache-Control": "public, max-age=10", "Retry-After": "10"}
+
+# ============================================================================
+# SQL Statements
+# ============================================================================
+
+# Hot-path queries as module constants: every call sends byte-identical SQL,
+# so each pooled connection parses/plans a statement once and then serves it
+# from asyncpg's per-connection statement cache (bind + execute only).
+
+UPDATE_LAST_LOGIN_SQL = "UPDATE promo_users SET last_login = $1 WHERE id = $2"
+
+# last_login is bookkeeping only - written in batches by a background task
+last_login_writer = BatchWriter(db, UPDATE_LAST_LOGIN_SQL)
+
+# Health check: DB round-trip, active offers and offers with approved content
+# in a single row
+HEALTH_SQL = """
+        SELECT
+            1 AS db_ok,
+            (
+                SELECT COUNT(*) FROM promo_offers
+                WHERE status = 'active'
+                AND (start_date IS NULL OR start_date <= NOW())
+                AND (end_date IS NULL OR end_date >= NOW())
+            ) AS active_count,
+            (
+                SELECT COUNT(*) FROM promo_offers o
+                WHERE o.status = 'active'
+                AND (o.start_date IS NULL OR o.start_date <= NOW())
+                AND (o.end_date IS NULL OR o.end_date >= NOW())
+                AND EXISTS (
+                    SELECT 1 FROM promo_text_variations t
+                    WHERE t.offer_id = o.id AND t.approved = TRUE
+                )
+            ) AS ready_count
+"""
+
+# Eligible newsletter offers (get_eligible_offers)
+ELIGIBLE_OFFERS_SQL = """
+        SELECT                   -- column order = EligibleOffer field order
+            o.id,
+            o.name,
+            o.offer_type,        -- 'review', 'affiliate' or 'donation' (coffee)
+            o.affiliate_slug,    -- Used to build tracking link
+            o.weight,            -- For weighted random selection
+            o.destination_url,
+            -- Approved variation ids, so the per-request variation pick is a
+            -- primary-key lookup instead of ORDER BY RANDOM() over the offer's rows
+            ARRAY(
+                SELECT t.id FROM promo_text_variations t
+                WHERE t.offer_id = o.id AND t.approved = TRUE
+            ) AS variation_ids
+        FROM promo_offers o
+        WHERE o.status = 'active'
+        AND (o.start_date IS NULL OR o.start_date <= NOW())  -- NULL = no start constraint
+        AND (o.end_date IS NULL OR o.end_date >= NOW())      -- NULL = no end constraint
+        AND EXISTS (
+            -- CRITICAL: Offer must have approved content to be selectable
+            -- This prevents showing offers with only draft variations
+            SELECT 1 FROM promo_text_variations t
+            WHERE t.offer_id = o.id AND t.approved = TRUE
+        )
+"""
+
+# Approved variation by id (select-random)
+SELECTED_VARIATION_SQL = """
+        SELECT id, text_content, cta_text, tone, length_category
+        FROM promo_text_variations
+        WHERE id = $1 AND approved = TRUE
+"""
+
+# Approved variation by id, with headline (select-random-regular)
+SELECTED_REGULAR_VARIATION_SQL = """
+        SELECT id, headline, text_content, cta_text
+        FROM promo_text_variations
+        WHERE id = $1 AND approved = TRUE
+"""
+
+
 # ============================================================================
 # Rate Limiting Configuration
 # ============================================================================
 
-# Initialize rate limiter with IP-based tracking
-limiter = Limiter(key_func=get_remote_address)
+# Initialize rate limiter with IP-based tracking (counters in
+# RATE_LIMIT_STORAGE_URI: per-process memory by default, Redis when shared)
+limiter = Limiter(key_func=get_remote_address, storage_uri=settings.RATE_LIMIT_STORAGE_URI)
+
+# ============================================================================
+# Application Lifespan
+# ============================================================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Startup and shutdown in one place (replaces the on_event handlers)
+
+    Startup opens the database pool, starts the batched writers (last_login,
+    impression/click tracking) and creates the shared OllamaService
+    (app.state.ollama). Shutdown runs in reverse: the writers flush their
+    queues while the pool is still open, then the pool is closed.
+    """
+    logger.info("🚀 Starting Promotional Content Management System")
+    await db.connect()
+    last_login_writer.start()
+    impression_writer.start()
+    click_writer.start()
+
+    # One client for the whole worker: keep-alive connections and the
+    # circuit breaker state are shared across generation requests
+    try:
+        app.state.ollama = OllamaService()
+    except ValueError as e:
+        app.state.ollama = None
+        logger.warning("⚠️ Text generation disabled: %s", e)
+
+    logger.info("✅ Application started successfully")
+
+    yield
+
+    logger.info("Shutting down application")
+    if app.state.ollama is not None:
+        await app.state.ollama.close()
+    await impression_writer.stop()
+    await click_writer.stop()
+    await last_login_writer.stop()
+    await db.disconnect()
+
+
+def get_ollama(request: Request) -> OllamaService:
+    """
+    FastAPI dependency returning the worker's shared OllamaService
+
+    Raises:
+        HTTPException: 503 if text generation is not configured
+    """
+    ollama = request.app.state.ollama
+    if ollama is None:
+        raise HTTPException(status_code=503, detail="Text generation is not configured")
+    return ollama
+
+
+# ============================================================================
+# Unhandled Errors
+# ============================================================================
+
+def internal_error_response(request: Request, exc: Exception) -> ORJSONResponse:
+    """
+    The single 500 response for unexpected exceptions
+
+    Endpoints don't wrap their bodies in try/except; anything unexpected
+    ends up here. The response carries a short error_id that is also in the
+    log line, so a report can be matched to its traceback without echoing
+    exception text to clients.
+    """
+    error_id = secrets.token_hex(6)
+    logger.error(
+        "❌ %s %s failed [error_id=%s]: %s",
+        request.method, request.url.path, error_id, exc, exc_info=True
+    )
+    return ORJSONResponse(
+        status_code=500,
+        content={
+            "error": "Internal server error",
+            "error_id": error_id,
+            "detail": str(exc) if settings.DEBUG else "An error occurred"
+        }
+    )
+
+
+class UnhandledErrorMiddleware:
+    """
+    Turn unexpected endpoint exceptions into the error_id 500 inside CORS
+
+    Starlette runs the app-level Exception handler in ServerErrorMiddleware,
+    outside every user middleware - so those 500s went out without CORS
+    headers (the dashboard only saw an opaque CORS error) and the exception
+    was re-raised to uvicorn, logging a second traceback. Registered before
+    CORSMiddleware, this middleware sits inside it and answers the request
+    itself. Plain ASGI (not BaseHTTPMiddleware) to keep the request path cheap.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            # Too late for an error response (e.g. a failing background task)
+            if response_started:
+                raise
+            response = internal_error_response(Request(scope), exc)
+            await response(scope, receive, send)
+
 
 # ============================================================================
 # FastAPI Application
@@ -68,13 +307,23 @@ app = FastAPI(
     description="AI-powered newsletter promotional system with fail-safe architecture",
     version="1.0.0",
     docs_url="/api/v1/docs",
-    redoc_url="/api/v1/redoc"
+    redoc_url="/api/v1/redoc",
+    default_response_class=ORJSONResponse,  # orjson instead of stdlib json for every response
+    lifespan=lifespan
 )
 
 # Attach rate limiter to app
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Gzip responses over 512 bytes (preview HTML, offer/text lists, analytics).
+# Newsletter selection responses are smaller and pass through untouched.
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=6)
+
+# Unexpected exceptions -> error_id 500 (must be added before CORS so the
+# 500 still gets CORS headers)
+app.add_middleware(UnhandledErrorMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -85,25 +334,6 @@ app.add_middleware(
 )
 
 
-# ============================================================================
-# Lifecycle Events
-# ============================================================================
-
-@app.on_event("startup")
-async def startup():
-    """Initialize database connection on startup"""
-    logger.info("🚀 Starting Promotional Content Management System")
-    await db.connect()
-    logger.info("✅ Application started successfully")
-
-
-@app.on_event("shutdown")
-async def shutdown():
-    """Close database connection on shutdown"""
-    logger.info("Shutting down application")
-    await db.disconnect()
-
-
 # ============================================================================
 # Authentication Endpoints
 # ============================================================================
@@ -131,17 +361,13 @@ async def login(
 
     # Create access token
     access_token = create_access_token(
-        data={"sub": user['email']}
+        sub=user['email'], uid=user['id'], role=user['role']
     )
 
-    # Update last login
-    await database.execute(
-        "UPDATE promo_users SET last_login = $1 WHERE id = $2",
-        datetime.utcnow(),
-        user['id']
-    )
+    # Update last login (batched, off the response path)
+    last_login_writer.add(datetime.utcnow(), user['id'])
 
-    logger.info(f"✅ User logged in: {user['email']}")
+    logger.info("✅ User logged in: %s", user['email'])
 
     return {
         "access_token": access_token,
@@ -155,11 +381,31 @@ async def login(
     }
 
 
+@app.post("/api/v1/auth/logout", status_code=status.HTTP_204_NO_CONTENT, tags=["Authentication"])
+@limiter.limit("30/minute")
+async def logout(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    Log out the presented bearer token
+
+    Revokes the token and evicts it from the per-token auth caches, so the
+    cached user stops authenticating immediately rather than after its TTL.
+    """
+    logout_token(credentials.credentials)
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @app.get("/api/v1/auth/me", response_model=UserResponse, tags=["Authentication"])
 @limiter.limit("100/minute")  # Standard rate limit for authenticated queries
-async def get_current_user_info(request: Request, current_user = Depends(get_current_user)):
+async def get_current_user_info(request: Request, current_user = Depends(get_current_user_fresh)):
     """
     Get current authenticated user information
+
+    Uses the fresh (uncached) user row - name, last_login and created_at
+    are not carried in the token.
     """
     return {
         "id": current_user['id'],
@@ -175,19 +421,18 @@ async def get_current_user_info(request: Request, current_user = Depends(get_cur
 # Health Check Endpoint (Fail-Safe System)
 # ============================================================================
 
-@app.get("/api/v1/promo/health", response_model=HealthCheckResponse, tags=["Fail-Safe"])
-@limiter.limit("60/minute")  # Allow frequent health check polling
-async def health_check(request: Request, database: Database = Depends(get_db)):
-    """
-    Comprehensive health check for fail-safe system
+# Health results are reused for HEALTH_CACHE_TTL seconds: pollers (60/min per
+# client) then share one DB query, and the newsletter fail-safe (5s timeout)
+# still sees a result at most 2 seconds old. Failures are cached too, so a
+# struggling database is not hammered by every poll.
+HEALTH_CACHE_TTL = 2.0
 
-    Checks:
-    - Database connectivity
-    - Active offers availability
-    - Approved content availability
+# (checked_at, health body, status code) of the last check
+_health_cache: Optional[Tuple[float, dict, int]] = None
 
-    Returns health status for newsletter generation system
-    """
+
+async def _check_health(database: Database) -> Tuple[dict, int]:
+    """Run the health query and build the response body and status code"""
     health = {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
@@ -195,66 +440,237 @@ async def health_check(request: Request, database: Database = Depends(get_db)):
         "can_provide_content": True
     }
 
-    # Check database
+    # Database, active offers and approved content in one round-trip
     try:
-        await database.fetchval("SELECT 1")
-        health["components"]["database"] = "healthy"
+        row = await database.fetchrow(HEALTH_SQL, timeout=NEWSLETTER_QUERY_TIMEOUT)
     except Exception as e:
-        health["components"]["database"] = f"failed: {str(e)}"
+        failed = f"failed: {str(e)}"
+        health["components"]["database"] = failed
+        health["components"]["active_offers"] = failed
+        health["components"]["approved_content"] = failed
         health["status"] = "failed"
         health["can_provide_content"] = False
+        return health, 503
 
-    # Check active offers
-    try:
-        active_count = await database.fetchval("""
-            SELECT COUNT(*) FROM promo_offers
-            WHERE status = 'active'
-            AND (start_date IS NULL OR start_date <= NOW())
-            AND (end_date IS NULL OR end_date >= NOW())
-        """)
-
-        if active_count > 0:
-            health["components"]["active_offers"] = f"healthy ({active_count} offers)"
-        else:
-            health["components"]["active_offers"] = "degraded (no active offers)"
-            health["status"] = "degraded"
-            health["can_provide_content"] = False
+    health["components"]["database"] = "healthy"
 
-    except Exception as e:
-        health["components"]["active_offers"] = f"failed: {str(e)}"
-        health["status"] = "failed"
+    # Check active offers
+    active_count = row['active_count']
+    if active_count > 0:
+        health["components"]["active_offers"] = f"healthy ({active_count} offers)"
+    else:
+        health["components"]["active_offers"] = "degraded (no active offers)"
+        health["status"] = "degraded"
         health["can_provide_content"] = False
 
     # Check approved content availability (text-only, images removed Oct 18, 2025)
-    try:
-        content_check = await database.fetchrow("""
-            SELECT
-                COUNT(DISTINCT o.id) as offers_with_content
-            FROM promo_offers o
-            WHERE o.status = 'active'
-            AND (o.start_date IS NULL OR o.start_date <= NOW())
-            AND (o.end_date IS NULL OR o.end_date >= NOW())
-            AND EXISTS (
-                SELECT 1 FROM promo_text_variations t
-                WHERE t.offer_id = o.id AND t.approved = TRUE
-            )
-        """)
-
-        if content_check['offers_with_content'] > 0:
-            health["components"]["approved_content"] = f"healthy ({content_check['offers_with_content']} ready)"
-        else:
-            health["components"]["approved_content"] = "degraded (no approved content)"
-            health["status"] = "degraded"
-            health["can_provide_content"] = False
-
-    except Exception as e:
-        health["components"]["approved_content"] = f"failed: {str(e)}"
-        health["status"] = "failed"
+    ready_count = row['ready_count']
+    if ready_count > 0:
+        health["components"]["approved_content"] = f"healthy ({ready_count} ready)"
+    else:
+        health["components"]["approved_content"] = "degraded (no approved content)"
+        health["status"] = "degraded"
         health["can_provide_content"] = False
 
     status_code = 200 if health["status"] == "healthy" else 503
 
-    return JSONResponse(content=health, status_code=status_code)
+    return health, status_code
+
+
+@app.get("/api/v1/promo/health", response_model=HealthCheckResponse, tags=["Fail-Safe"])
+@limiter.limit("60/minute")  # Allow frequent health check polling
+async def health_check(request: Request, database: Database = Depends(get_db)):
+    """
+    Comprehensive health check for fail-safe system
+
+    Checks:
+    - Database connectivity
+    - Active offers availability
+    - Approved content availability
+
+    Returns health status for newsletter generation system. Results are
+    cached for HEALTH_CACHE_TTL (2) seconds; "timestamp" is when the
+    check actually ran.
+    """
+    global _health_cache
+    cached = _health_cache
+    if cached is None or time.monotonic() - cached[0] >= HEALTH_CACHE_TTL:
+        health, status_code = await _check_health(database)
+        cached = _health_cache = (time.monotonic(), health, status_code)
+
+    _, health, status_code = cached
+    return ORJSONResponse(
+        content=health,
+        status_code=status_code,
+        headers={"Cache-Control": f"max-age={int(HEALTH_CACHE_TTL)}"}
+    )
+
+
+# ============================================================================
+# Newsletter Selection Cache
+# ============================================================================
+
+# Eligible offers change minutes-to-hours apart, while the newsletter system
+# calls the selection endpoints up to 120x/minute. The eligible list is cached
+# per process for ELIGIBLE_OFFERS_TTL seconds and dropped immediately by any
+# offer or text-approval write (invalidate_eligible_offers). Only the text
+# variation pick stays a live query.
+ELIGIBLE_OFFERS_TTL = 30.0
+
+# Offer types served by /select-random-regular (coffee/donation excluded)
+REGULAR_OFFER_TYPES = ('affiliate', 'review')
+
+# Newsletter tracking links by offer type. Review offers link to our review
+# article; every other type (affiliate, donation) goes through the CMS
+# cloaked redirect at /{slug}. promo_var carries the text variation id.
+_LINK_TEMPLATES = {
+    'review': 'https://aidailypost.com/review/{slug}?utm_source=newsletter&promo_var={vid}',
+    'affiliate': 'https://aidailypost.com/{slug}?utm_source=newsletter&promo_var={vid}',
+}
+_DEFAULT_LINK_TEMPLATE = _LINK_TEMPLATES['affiliate']
+
+
+class EligibleOffer(NamedTuple):
+    """
+    One eligible offer, converted from its asyncpg Record at cache fill
+
+    Record['name'] looks the key up in the record's column list on every
+    access; NamedTuple fields are plain attribute reads. Field order must
+    match the column order of ELIGIBLE_OFFERS_SQL.
+    """
+    id: int
+    name: str
+    offer_type: str
+    affiliate_slug: Optional[str]
+    weight: int
+    destination_url: Optional[str]
+    variation_ids: List[int]
+
+
+class WeightedOffers(NamedTuple):
+    """
+    Offers plus their cumulative weights, built once per cache refresh
+
+    Each offer has a weight (default 1, user-configurable); higher weight =
+    higher probability. Example: weights [10, 5, 1] → cumulative [10, 15, 16]
+    → 62.5% / 31.25% / 6.25%. This allows prioritizing high-value offers
+    without completely excluding lower-priority ones (maintains variety).
+    """
+    offers: List[EligibleOffer]
+    cum_weights: List[int]
+
+    @classmethod
+    def build(cls, offers: List[EligibleOffer]) -> "WeightedOffers":
+        return cls(offers, list(itertools.accumulate(o.weight for o in offers)))
+
+    def pick(self) -> EligibleOffer:
+        """
+        Weighted random offer - binary search over the cumulative weights
+
+        The API enforces weight >= 1 but the column doesn't: if the weights
+        don't add up to a positive total (all 0), fall back to the first
+        offer, as the original selection loop did.
+        """
+        total = self.cum_weights[-1]
+        if total <= 0:
+            return self.offers[0]
+        index = bisect.bisect_right(self.cum_weights, random.random() * total)
+        return self.offers[index] if index < len(self.offers) else self.offers[0]
+
+
+class EligibleOffers(NamedTuple):
+    """Cached eligible offers: all of them, and the regular-only subset"""
+    loaded_at: float
+    all: WeightedOffers
+    regular: WeightedOffers
+
+
+_eligible_offers: Optional[EligibleOffers] = None
+_eligible_offers_lock = asyncio.Lock()
+# Bumped by every invalidation, so a refresh that raced with a write is not stored
+_eligible_offers_generation = 0
+
+
+def invalidate_eligible_offers() -> None:
+    """Drop the cached eligible offers (call after offer/text-approval writes)"""
+    global _eligible_offers, _eligible_offers_generation
+    _eligible_offers = None
+    _eligible_offers_generation += 1
+
+
+async def get_eligible_offers(database: Database) -> EligibleOffers:
+    """
+    Return the eligible-offer lists, querying at most once per TTL
+
+    Eligible = active, within its date range, and with at least one approved
+    text variation. Concurrent callers on a cold/expired cache wait for a
+    single refresh (single-flight lock) instead of all querying at once.
+    """
+    global _eligible_offers
+    cached = _eligible_offers
+    if cached is not None and time.monotonic() - cached.loaded_at < ELIGIBLE_OFFERS_TTL:
+        return cached
+
+    async with _eligible_offers_lock:
+        cached = _eligible_offers
+        if cached is not None and time.monotonic() - cached.loaded_at < ELIGIBLE_OFFERS_TTL:
+            return cached
+
+        generation = _eligible_offers_generation
+        rows = await database.fetch(ELIGIBLE_OFFERS_SQL, timeout=NEWSLETTER_QUERY_TIMEOUT)
+        offers = [EligibleOffer(*row) for row in rows]
+
+        cached = EligibleOffers(
+            loaded_at=time.monotonic(),
+            all=WeightedOffers.build(offers),
+            regular=WeightedOffers.build([o for o in offers if o.offer_type in REGULAR_OFFER_TYPES])
+        )
+        if generation == _eligible_offers_generation:
+            _eligible_offers = cached
+        return cached
+
+
+async def select_offer_and_text(
+    database: Database, regular: bool = False
+) -> Tuple[Optional[EligibleOffer], Optional[asyncpg.Record]]:
+    """
+    Weighted-random eligible offer plus one of its approved text variations
+
+    The offer's approved variation ids come with the cached eligible list,
+    so the random pick happens here and the query is a primary-key lookup.
+    Another worker may have unapproved/regenerated/deleted that variation
+    within the cache TTL: on a miss the cache is dropped and the pick is
+    retried once against freshly loaded data, so a stale cache alone never
+    costs the newsletter its promo.
+
+    Args:
+        database: Database instance
+        regular: Only affiliate/review offers (coffee/donation excluded)
+
+    Returns:
+        (offer, text): offer is None if nothing is eligible; text is None
+        if the fresh retry still found no approved variation
+    """
+    selected_sql = SELECTED_REGULAR_VARIATION_SQL if regular else SELECTED_VARIATION_SQL
+    selected_offer = None
+
+    for attempt in range(2):
+        offers = await get_eligible_offers(database)
+        eligible = offers.regular if regular else offers.all
+        if not eligible.offers:
+            return None, None
+
+        selected_offer = eligible.pick()
+        selected_text = await database.fetchrow(
+            selected_sql, random.choice(selected_offer.variation_ids), timeout=NEWSLETTER_QUERY_TIMEOUT)
+        if selected_text:
+            return selected_offer, selected_text
+
+        logger.warning("⚠️ Offer %s: cached variation no longer approved, reloading eligible offers",
+                       selected_offer.id)
+        invalidate_eligible_offers()
+
+    return selected_offer, None
 
 
 # ============================================================================
@@ -283,37 +699,21 @@ async def select_random_promo(request: Request, database: Database = Depends(get
         Newsletter system will send without promo (5-second timeout)
     """
     try:
-        # STEP 1: Query for eligible offers
-        # -----------------------------------
+        # STEP 1: Eligible offer + approved text (cached, see select_offer_and_text)
+        # --------------------------------------------------------------------------
         # We need offers that meet ALL these criteria:
         # - Active status (manually set by user in dashboard)
         # - Within date range (optional start/end dates for seasonal offers)
         # - Has at least one approved text variation (can't show offer without copy)
         #
-        # Why DISTINCT? Technically not needed since we're selecting from offers table,
-        # but included as defensive programming in case future JOIN logic changes.
-        #
-        # Why include weight? Used for weighted random selection - higher weight =
-        # higher probability of selection. Allows user to prioritize certain offers.
-        eligible_offers = await database.fetch("""
-            SELECT DISTINCT
-                o.id,
-                o.name,
-                o.offer_type,        -- 'review' or 'affiliate' (added Oct 18, 2025)
-                o.affiliate_slug,    -- Used to build tracking link
-                o.weight,            -- For weighted random selection
-                o.destination_url
-            FROM promo_offers o
-            WHERE o.status = 'active'
-            AND (o.start_date IS NULL OR o.start_date <= NOW())  -- NULL = no start constraint
-            AND (o.end_date IS NULL OR o.end_date >= NOW())      -- NULL = no end constraint
-            AND EXISTS (
-                -- CRITICAL: Offer must have approved content to be selectable
-                -- This prevents showing offers with only draft variations
-                SELECT 1 FROM promo_text_variations t
-                WHERE t.offer_id = o.id AND t.approved = TRUE
-            )
-        """)
+        # The offer is a weighted random pick; the text is a random variation of
+        # it. Why random text? This is the variation rotation system:
+        # - Offer may have 3-8 AI-generated text variations (different headlines/copy)
+        # - Each newsletter send randomly picks one variation
+        # - Same product, fresh copy every time
+        # - Reduces subscriber fatigue from seeing identical promos
+        # - Enables A/B testing of copywriting styles
+        selected_offer, selected_text = await select_offer_and_text(database)
 
         # STEP 2: Handle no eligible offers (fail-safe behavior)
         # -------------------------------------------------------
@@ -323,9 +723,9 @@ async def select_random_promo(request: Request, database: Database = Depends(get
         #
         # This is by design - we prioritize newsletter delivery over promo inclusion.
         # Better to send newsletter without promo than to delay/fail the entire send.
-        if not eligible_offers:
+        if selected_offer is None:
             logger.warning("⚠️ No eligible offers for newsletter selection")
-            return JSONResponse(
+            return ORJSONResponse(
                 content={
                     "offer_id": None,
                     "name": None,
@@ -334,69 +734,17 @@ async def select_random_promo(request: Request, database: Database = Depends(get
                     "approved_text": None,
                     "message": "No active offers available"
                 },
-                status_code=503  # Service Unavailable - tells newsletter to skip promo
+                status_code=503,  # Service Unavailable - tells newsletter to skip promo
+                headers=NO_OFFERS_RETRY_HEADERS
             )
 
-        # STEP 3: Weighted random selection of offer
-        # -------------------------------------------
-        # Algorithm: Each offer has a weight (default 1, user-configurable).
-        # Higher weight = higher probability of selection.
-        #
-        # Example: Offers with weights [10, 5, 1]
-        # - Total weight = 16
-        # - Random number between 0 and 16
-        # - 0-10 → selects offer 1 (62.5% chance)
-        # - 10-15 → selects offer 2 (31.25% chance)
-        # - 15-16 → selects offer 3 (6.25% chance)
-        #
-        # This allows user to prioritize high-value offers without completely
-        # excluding lower-priority offers (maintains variety).
-        import random
-        total_weight = sum(offer['weight'] for offer in eligible_offers)
-        rand = random.uniform(0, total_weight)
-
-        cumulative_weight = 0
-        selected_offer = None
-
-        for offer in eligible_offers:
-            cumulative_weight += offer['weight']
-            if rand <= cumulative_weight:
-                selected_offer = offer
-                break
-
-        # Defensive fallback: If somehow no offer selected (floating point rounding?),
-        # just use the first eligible offer. This should never happen in practice.
-        if not selected_offer:
-            selected_offer = eligible_offers[0]
-            logger.warning(f"⚠️ Weighted selection failed, using first offer as fallback")
-
-        # STEP 4: Select random text variation for the chosen offer
-        # ----------------------------------------------------------
-        # Why random selection? This is the variation rotation system.
-        # - Offer may have 3-8 AI-generated text variations (different headlines/copy)
-        # - Each newsletter send randomly picks one variation
-        # - Same product, fresh copy every time
-        # - Reduces subscriber fatigue from seeing identical promos
-        # - Enables A/B testing of copywriting styles
-        #
-        # ORDER BY RANDOM() is PostgreSQL-specific and efficient for small result sets.
-        # Since we LIMIT 1, this is very fast (<1ms typically).
-        text_variations = await database.fetch("""
-            SELECT id, text_content, cta_text, tone, length_category
-            FROM promo_text_variations
-            WHERE offer_id = $1 AND approved = TRUE
-            ORDER BY RANDOM()  -- Random selection for variation rotation
-            LIMIT 1
-        """, selected_offer['id'])
-
-        # STEP 5: Handle data integrity issue (should never happen)
-        # ----------------------------------------------------------
-        # We already verified in STEP 1 that this offer has approved text.
-        # If we somehow don't find any here, it's a race condition or database issue.
-        # Fail gracefully and log for investigation.
-        if not text_variations:
-            logger.error(f"❌ Offer {selected_offer['id']} has no approved text (data integrity issue)")
-            return JSONResponse(
+        # STEP 3: Handle data integrity issue
+        # ------------------------------------
+        # Even freshly loaded data pointed at a variation that is not approved
+        # (changed between the two queries) - fail gracefully.
+        if not selected_text:
+            logger.error("❌ Offer %s has no approved text (data integrity issue)", selected_offer.id)
+            return ORJSONResponse(
                 content={
                     "offer_id": None,
                     "name": None,
@@ -408,9 +756,7 @@ async def select_random_promo(request: Request, database: Database = Depends(get
                 status_code=503
             )
 
-        selected_text = text_variations[0]
-
-        # STEP 6: Build tracking link with variation ID
+        # STEP 4: Build tracking link with variation ID
         # ----------------------------------------------
         # Link format depends on offer type:
         #
@@ -431,16 +777,10 @@ async def select_random_promo(request: Request, database: Database = Depends(get
         #   This allows us to track which specific text variation drove the click.
         #   Future Phase 3.1: Affiliate redirect will extract this and log asynchronously.
         #   Future Phase 3.2: Use this data for self-learning optimization.
-        base_domain = "https://aidailypost.com"
-        if selected_offer['offer_type'] == 'review':
-            link = f"{base_domain}/review/{selected_offer['affiliate_slug']}"
-        else:
-            link = f"{base_domain}/{selected_offer['affiliate_slug']}"
-
-        # Add tracking parameters (will be URL-encoded by HTTP client)
-        link += f"?utm_source=newsletter&promo_var={selected_text['id']}"
+        link = _LINK_TEMPLATES.get(selected_offer.offer_type, _DEFAULT_LINK_TEMPLATE).format(
+            slug=selected_offer.affiliate_slug, vid=selected_text['id'])
 
-        # STEP 7: Log successful selection for monitoring/debugging
+        # STEP 5: Log successful selection for monitoring/debugging
         # ----------------------------------------------------------
         # This log line is crucial for:
         # - Verifying system is working correctly
@@ -448,11 +788,11 @@ async def select_random_promo(request: Request, database: Database = Depends(get
         # - Analytics on which offers are being selected
         # - Audit trail for business intelligence
         logger.info(
-            f"✅ Newsletter promo selected: Offer {selected_offer['id']} ({selected_offer['name']}) "
-            f"with text variation {selected_text['id']}"
+            "✅ Newsletter promo selected: Offer %s (%s) with text variation %s",
+            selected_offer.id, selected_offer.name, selected_text['id']
         )
 
-        # STEP 8: Return complete promo content for newsletter
+        # STEP 6: Return complete promo content for newsletter
         # -----------------------------------------------------
         # This response is consumed directly by the newsletter generation system.
         # Newsletter template will inject this into HTML email after first 2-3 stories.
@@ -462,9 +802,9 @@ async def select_random_promo(request: Request, database: Database = Depends(get
         # - Includes variation_id for tracking
         # - Includes offer_type for proper link handling
         return {
-            "offer_id": selected_offer['id'],
-            "offer_name": selected_offer['name'],
-            "offer_type": selected_offer['offer_type'],
+            "offer_id": selected_offer.id,
+            "offer_name": selected_offer.name,
+            "offer_type": selected_offer.offer_type,
             "text": selected_text['text_content'],
             "cta": selected_text['cta_text'],
             "link": link,
@@ -479,8 +819,8 @@ async def select_random_promo(request: Request, database: Database = Depends(get
         #
         # This is critical - we NEVER want promo system to break newsletter delivery.
         # Newsletter system has 5-second timeout, so even slow queries will trigger this.
-        logger.error(f"❌ Failed to select newsletter promo: {e}")
-        return JSONResponse(
+        logger.error("❌ Failed to select newsletter promo: %s", e)
+        return ORJSONResponse(
             content={
                 "offer_id": None,
                 "name": None,
@@ -522,30 +862,14 @@ async def select_random_regular_promo(request: Request, database: Database = Dep
         Newsletter system will send without mid-newsletter promo (5-second timeout)
     """
     try:
-        # STEP 1: Query for eligible REGULAR offers (exclude coffee/donation)
-        eligible_offers = await database.fetch("""
-            SELECT DISTINCT
-                o.id,
-                o.name,
-                o.offer_type,
-                o.affiliate_slug,
-                o.weight,
-                o.destination_url
-            FROM promo_offers o
-            WHERE o.status = 'active'
-            AND o.offer_type IN ('affiliate', 'review')  -- v3.5.0: Exclude donation (coffee)
-            AND (o.start_date IS NULL OR o.start_date <= NOW())
-            AND (o.end_date IS NULL OR o.end_date >= NOW())
-            AND EXISTS (
-                SELECT 1 FROM promo_text_variations t
-                WHERE t.offer_id = o.id AND t.approved = TRUE
-            )
-        """)
+        # STEP 1: Eligible REGULAR offer + approved text (cached, coffee/donation
+        # excluded; reloaded once if the cached variation went stale)
+        selected_offer, selected_text = await select_offer_and_text(database, regular=True)
 
         # STEP 2: Fail-safe if no regular offers available
-        if not eligible_offers:
+        if selected_offer is None:
             logger.warning("⚠️ No eligible regular offers for newsletter selection")
-            return JSONResponse(
+            return ORJSONResponse(
                 content={
                     "offer_id": None,
                     "name": None,
@@ -554,39 +878,14 @@ async def select_random_regular_promo(request: Request, database: Database = Dep
                     "approved_text": None,
                     "message": "No active regular offers available"
                 },
-                status_code=503
+                status_code=503,
+                headers=NO_OFFERS_RETRY_HEADERS
             )
 
-        # STEP 3: Weighted random selection
-        import random
-        total_weight = sum(offer['weight'] for offer in eligible_offers)
-        rand = random.uniform(0, total_weight)
-
-        cumulative_weight = 0
-        selected_offer = None
-
-        for offer in eligible_offers:
-            cumulative_weight += offer['weight']
-            if rand <= cumulative_weight:
-                selected_offer = offer
-                break
-
-        if not selected_offer:
-            selected_offer = eligible_offers[0]
-            logger.warning(f"⚠️ Weighted selection failed, using first regular offer as fallback")
-
-        # STEP 4: Select random text variation
-        text_variations = await database.fetch("""
-            SELECT id, headline, text_content, cta_text
-            FROM promo_text_variations
-            WHERE offer_id = $1 AND approved = TRUE
-            ORDER BY RANDOM()
-            LIMIT 1
-        """, selected_offer['id'])
-
-        if not text_variations:
-            logger.error(f"❌ Regular offer {selected_offer['id']} has no approved text")
-            return JSONResponse(
+        # STEP 3: Fail-safe if even fresh data had no approved text
+        if not selected_text:
+            logger.error("❌ Regular offer %s has no approved text", selected_offer.id)
+            return ORJSONResponse(
                 content={
                     "offer_id": None,
                     "name": None,
@@ -598,28 +897,21 @@ async def select_random_regular_promo(request: Request, database: Database = Dep
                 status_code=503
             )
 
-        selected_text = text_variations[0]
-
-        # STEP 5: Build tracking link
-        base_domain = "https://aidailypost.com"
-        if selected_offer['offer_type'] == 'review':
-            link = f"{base_domain}/review/{selected_offer['affiliate_slug']}"
-        else:
-            link = f"{base_domain}/{selected_offer['affiliate_slug']}"
-
-        link += f"?utm_source=newsletter&promo_var={selected_text['id']}"
+        # STEP 4: Build tracking link
+        link = _LINK_TEMPLATES.get(selected_offer.offer_type, _DEFAULT_LINK_TEMPLATE).format(
+            slug=selected_offer.affiliate_slug, vid=selected_text['id'])
 
         logger.info(
-            f"✅ Regular newsletter promo selected: Offer {selected_offer['id']} ({selected_offer['name']}) "
-            f"with text variation {selected_text['id']}"
+            "✅ Regular newsletter promo selected: Offer %s (%s) with text variation %s",
+            selected_offer.id, selected_offer.name, selected_text['id']
         )
 
-        # STEP 6: Return promo content
+        # STEP 5: Return promo content
         return {
-            "offer_id": selected_offer['id'],
-            "offer_name": selected_offer['name'],
-            "offer_type": selected_offer['offer_type'],
-            "headline": selected_text.get('headline'),  # May be None for some offers
+            "offer_id": selected_offer.id,
+            "offer_name": selected_offer.name,
+            "offer_type": selected_offer.offer_type,
+            "headline": selected_text['headline'],  # May be None for some offers
             "text": selected_text['text_content'],
             "cta": selected_text['cta_text'],
             "link": link,
@@ -627,8 +919,8 @@ async def select_random_regular_promo(request: Request, database: Database = Dep
         }
 
     except Exception as e:
-        logger.error(f"❌ Failed to select regular newsletter promo: {e}")
-        return JSONResponse(
+        logger.error("❌ Failed to select regular newsletter promo: %s", e)
+        return ORJSONResponse(
             content={
                 "offer_id": None,
                 "name": None,
@@ -688,12 +980,12 @@ async def select_coffee_sponsor(request: Request, database: Database = Depends(g
                 SELECT 1 FROM promo_text_variations t
                 WHERE t.offer_id = o.id AND t.approved = TRUE
             )
-        """)
+        """, timeout=NEWSLETTER_QUERY_TIMEOUT)
 
         # STEP 2: Fail-safe if coffee sponsor not available
         if not coffee_offer:
             logger.warning("⚠️ Coffee sponsor offer not available for newsletter")
-            return JSONResponse(
+            return ORJSONResponse(
                 content={
                     "offer_id": None,
                     "name": None,
@@ -702,7 +994,8 @@ async def select_coffee_sponsor(request: Request, database: Database = Depends(g
                     "approved_text": None,
                     "message": "Coffee sponsor not available"
                 },
-                status_code=503
+                status_code=503,
+                headers=NO_OFFERS_RETRY_HEADERS
             )
 
         # STEP 3: Select random text variation from coffee offer
@@ -714,11 +1007,11 @@ async def select_coffee_sponsor(request: Request, database: Database = Depends(g
             WHERE offer_id = $1 AND approved = TRUE
             ORDER BY RANDOM()
             LIMIT 1
-        """, coffee_offer['id'])
+        """, coffee_offer['id'], timeout=NEWSLETTER_QUERY_TIMEOUT)
 
         if not text_variations:
-            logger.error(f"❌ Coffee offer {coffee_offer['id']} has no approved text")
-            return JSONResponse(
+            logger.error("❌ Coffee offer %s has no approved text", coffee_offer['id'])
+            return ORJSONResponse(
                 content={
                     "offer_id": None,
                     "name": None,
@@ -733,13 +1026,11 @@ async def select_coffee_sponsor(request: Request, database: Database = Depends(g
         selected_text = text_variations[0]
 
         # STEP 4: Build tracking link (coffee = donation link)
-        base_domain = "https://aidailypost.com"
-        link = f"{base_domain}/{coffee_offer['affiliate_slug']}"
-        link += f"?utm_source=newsletter&promo_var={selected_text['id']}"
+        link = _DEFAULT_LINK_TEMPLATE.format(slug=coffee_offer['affiliate_slug'], vid=selected_text['id'])
 
         logger.info(
-            f"☕ Coffee sponsor selected for newsletter outro: "
-            f"Variation {selected_text['id']} (offer {coffee_offer['id']})"
+            "☕ Coffee sponsor selected for newsletter outro: Variation %s (offer %s)",
+            selected_text['id'], coffee_offer['id']
         )
 
         # STEP 5: Return coffee sponsor content
@@ -756,8 +1047,8 @@ async def select_coffee_sponsor(request: Request, database: Database = Depends(g
         }
 
     except Exception as e:
-        logger.error(f"❌ Failed to select coffee sponsor: {e}")
-        return JSONResponse(
+        logger.error("❌ Failed to select coffee sponsor: %s", e)
+        return ORJSONResponse(
             content={
                 "offer_id": None,
                 "name": None,
@@ -774,6 +1065,124 @@ async def select_coffee_sponsor(request: Request, database: Database = Depends(g
 # Offer Management Endpoints (CRUD)
 # ============================================================================
 
+# Offer reads (dashboard list/detail) are far more frequent than offer
+# writes. Responses are cached per process, keyed ("list", status_filter) or
+# ("offer", offer_id), and the whole cache is cleared by any offer write in
+# this process. Other workers (and the impression/click counters) catch up
+# within OFFER_CACHE_TTL seconds.
+OFFER_CACHE_TTL = 30
+
+_offer_cache: TTLCache = TTLCache(maxsize=1024, ttl=OFFER_CACHE_TTL)
+# Bumped by every invalidation, so a read that raced with a write is not stored
+_offer_cache_generation = 0
+
+
+# Offer columns returned by the CRUD endpoints (OfferResponse)
+OFFER_COLUMNS = """
+            id, name, description, offer_type, destination_url, affiliate_slug, status,
+            start_date, end_date, priority, weight,
+            total_impressions, total_clicks, ctr,
+            created_at, updated_at
+"""
+
+# One fixed SQL text per query shape, so each is prepared once per connection
+# and then served from asyncpg's statement cache
+LIST_OFFERS_SQL = f"""
+        SELECT {OFFER_COLUMNS}
+        FROM promo_offers
+        ORDER BY priority DESC, created_at DESC, id DESC
+"""
+
+LIST_OFFERS_BY_STATUS_SQL = f"""
+        SELECT {OFFER_COLUMNS}
+        FROM promo_offers
+        WHERE status = $1
+        ORDER BY priority DESC, created_at DESC, id DESC
+"""
+
+# Keyset pages: the first page, then rows strictly after the cursor's
+# (priority, created_at, id) in list order. Separate statements per shape
+# so the cursor condition is never an "IS NULL OR ..." that defeats the index.
+# priority and created_at are NOT NULL (migration 006), as is the id key. A
+# NULL in a key column would fail the row comparison and never be paged to.
+LIST_OFFERS_FIRST_PAGE_SQL = LIST_OFFERS_SQL + "        LIMIT $1\n"
+
+LIST_OFFERS_BY_STATUS_FIRST_PAGE_SQL = LIST_OFFERS_BY_STATUS_SQL + "        LIMIT $2\n"
+
+LIST_OFFERS_AFTER_SQL = f"""
+        SELECT {OFFER_COLUMNS}
+        FROM promo_offers
+        WHERE (priority, created_at, id) < ($1, $2, $3)
+        ORDER BY priority DESC, created_at DESC, id DESC
+        LIMIT $4
+"""
+
+LIST_OFFERS_BY_STATUS_AFTER_SQL = f"""
+        SELECT {OFFER_COLUMNS}
+        FROM promo_offers
+        WHERE status = $1
+        AND (priority, created_at, id) < ($2, $3, $4)
+        ORDER BY priority DESC, created_at DESC, id DESC
+        LIMIT $5
+"""
+
+# Upper bound for ?limit= on list endpoints
+MAX_PAGE_SIZE = 200
+
+
+def encode_offer_cursor(offer: dict) -> str:
+    """Opaque keyset cursor for the row after `offer` (urlsafe base64 JSON)"""
+    key = [offer['priority'], offer['created_at'].isoformat(), offer['id']]
+    return base64.urlsafe_b64encode(orjson.dumps(key)).decode()
+
+
+def decode_offer_cursor(cursor: str) -> Tuple[int, datetime, int]:
+    """
+    Decode a cursor from encode_offer_cursor()
+
+    Raises:
+        HTTPException: 400 for a malformed cursor
+    """
+    try:
+        priority, created_at, offer_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(priority), datetime.fromisoformat(created_at), int(offer_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+OFFER_BY_ID_SQL = f"""
+        SELECT {OFFER_COLUMNS}
+        FROM promo_offers
+        WHERE id = $1
+"""
+
+
+# Partial update with one fixed SQL text: every field is always sent, and a
+# NULL parameter (field not provided) keeps the current value via COALESCE
+UPDATE_OFFER_SQL = f"""
+        UPDATE promo_offers
+        SET name = COALESCE($1, name),
+            description = COALESCE($2, description),
+            offer_type = COALESCE($3, offer_type),
+            destination_url = COALESCE($4, destination_url),
+            affiliate_slug = COALESCE($5, affiliate_slug),
+            status = COALESCE($6, status),
+            start_date = COALESCE($7, start_date),
+            end_date = COALESCE($8, end_date),
+            priority = COALESCE($9, priority),
+            weight = COALESCE($10, weight),
+            updated_at = NOW()
+        WHERE id = $11
+        RETURNING {OFFER_COLUMNS}
+"""
+
+
+def invalidate_offer_cache() -> None:
+    """Drop all cached offer responses (call after offer writes)"""
+    global _offer_cache_generation
+    _offer_cache.clear()
+    _offer_cache_generation += 1
+
+
 @app.post("/api/v1/offers", response_model=OfferResponse, tags=["Offers"])
 @limiter.limit("100/minute")  # Standard CRUD operation limit
 async def create_offer(
@@ -787,29 +1196,26 @@ async def create_offer(
 
     Requires authentication. Creates offer in 'draft' status by default.
     """
-    try:
-        result = await database.fetchrow("""
-            INSERT INTO promo_offers (
-                name, description, offer_type, destination_url, affiliate_slug,
-                status, start_date, end_date, priority, weight,
-                created_by, created_at, updated_at
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, NOW(), NOW())
-            RETURNING id, name, description, offer_type, destination_url, affiliate_slug, status,
-                      start_date, end_date, priority, weight,
-                      total_impressions, total_clicks, ctr,
-                      created_at, updated_at
-        """, offer.name, offer.description, offer.offer_type, str(offer.destination_url),
-            offer.affiliate_slug, offer.status, offer.start_date, offer.end_date,
-            offer.priority, offer.weight, current_user['id']
-        )
-
-        logger.info(f"✅ Offer created: {result['name']} (ID: {result['id']}) by {current_user['email']}")
+    result = await database.fetchrow("""
+        INSERT INTO promo_offers (
+            name, description, offer_type, destination_url, affiliate_slug,
+            status, start_date, end_date, priority, weight,
+            created_by, created_at, updated_at
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, NOW(), NOW())
+        RETURNING id, name, description, offer_type, destination_url, affiliate_slug, status,
+                  start_date, end_date, priority, weight,
+                  total_impressions, total_clicks, ctr,
+                  created_at, updated_at
+    """, offer.name, offer.description, offer.offer_type, str(offer.destination_url),
+        offer.affiliate_slug, offer.status, offer.start_date, offer.end_date,
+        offer.priority, offer.weight, current_user['id']
+    )
 
-        return dict(result)
+    invalidate_eligible_offers()
+    invalidate_offer_cache()
+    logger.info(f"✅ Offer created: {result['name']} (ID: {result['id']}) by {current_user['email']}")
 
-    except Exception as e:
-        logger.error(f"Failed to create offer: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to create offer: {str(e)}")
+    return dict(result)
 
 
 @app.get("/api/v1/offers", response_model=OfferListResponse, tags=["Offers"])
@@ -817,6 +1223,8 @@ async def create_offer(
 async def list_offers(
     request: Request,
     status_filter: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_user),
     database: Database = Depends(get_db)
 ):
@@ -824,34 +1232,55 @@ async def list_offers(
     List all promotional offers
 
     Optional filter by status: active, paused, ended, draft
-    """
-    try:
-        # Build query with parameterized WHERE clause to prevent SQL injection
-        query = """
-            SELECT id, name, description, offer_type, destination_url, affiliate_slug, status,
-                   start_date, end_date, priority, weight,
-                   total_impressions, total_clicks, ctr,
-                   created_at, updated_at
-            FROM promo_offers
-        """
 
-        params = []
-        if status_filter:
-            query += " WHERE status = $1"
-            params.append(status_filter)
-
-        query += " ORDER BY priority DESC, created_at DESC"
-
-        offers = await database.fetch(query, *params)
+    Optional keyset pagination: pass `limit` for the first page, then the
+    returned `next_cursor` as `cursor` for the following ones. Each page is
+    an index seek on (status, priority, created_at, id) - no OFFSET scan. Without
+    `limit`, all offers are returned as before.
+    """
+    cache_key = ("list", status_filter, limit, cursor)
+    cached = _offer_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
 
-        return {
-            "offers": [dict(offer) for offer in offers],
-            "total": len(offers)
-        }
+    generation = _offer_cache_generation
 
-    except Exception as e:
-        logger.error(f"Failed to list offers: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to list offers: {str(e)}")
+    # Parameterized WHERE clause (no SQL injection), fixed SQL text per shape
+    next_cursor = None
+    if limit is None:
+        if status_filter:
+            offers = await database.fetch(LIST_OFFERS_BY_STATUS_SQL, status_filter, dicts=True)
+        else:
+            offers = await database.fetch(LIST_OFFERS_SQL, dicts=True)
+    else:
+        # One extra row tells whether another page follows
+        if cursor:
+            after = decode_offer_cursor(cursor)
+            if status_filter:
+                offers = await database.fetch(
+                    LIST_OFFERS_BY_STATUS_AFTER_SQL, status_filter, *after, limit + 1, dicts=True)
+            else:
+                offers = await database.fetch(LIST_OFFERS_AFTER_SQL, *after, limit + 1, dicts=True)
+        elif status_filter:
+            offers = await database.fetch(
+                LIST_OFFERS_BY_STATUS_FIRST_PAGE_SQL, status_filter, limit + 1, dicts=True)
+        else:
+            offers = await database.fetch(LIST_OFFERS_FIRST_PAGE_SQL, limit + 1, dicts=True)
+        if len(offers) > limit:
+            offers = offers[:limit]
+            next_cursor = encode_offer_cursor(offers[-1])
+
+    # Rows come straight from the database: serialize them directly
+    # instead of validating each one through OfferListResponse (the
+    # response_model stays on the route for the OpenAPI docs)
+    body = to_json({
+        "offers": offers,
+        "total": len(offers),
+        "next_cursor": next_cursor
+    })
+    if generation == _offer_cache_generation:
+        _offer_cache[cache_key] = body
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/api/v1/offers/{offer_id}", response_model=OfferResponse, tags=["Offers"])
@@ -865,28 +1294,23 @@ async def get_offer(
     """
     Get a single promotional offer by ID
 
-    Includes full details and statistics
+    Includes full details and statistics (cached up to OFFER_CACHE_TTL seconds)
     """
-    try:
-        offer = await database.fetchrow("""
-            SELECT id, name, description, offer_type, destination_url, affiliate_slug, status,
-                   start_date, end_date, priority, weight,
-                   total_impressions, total_clicks, ctr,
-                   created_at, updated_at
-            FROM promo_offers
-            WHERE id = $1
-        """, offer_id)
+    cache_key = ("offer", offer_id)
+    cached = _offer_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-        if not offer:
-            raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
+    generation = _offer_cache_generation
+    offer = await database.fetchrow(OFFER_BY_ID_SQL, offer_id)
 
-        return dict(offer)
+    if not offer:
+        raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to get offer {offer_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get offer: {str(e)}")
+    response = dict(offer)
+    if generation == _offer_cache_generation:
+        _offer_cache[cache_key] = response
+    return response
 
 
 @app.put("/api/v1/offers/{offer_id}", response_model=OfferResponse, tags=["Offers"])
@@ -903,92 +1327,25 @@ async def update_offer(
 
     Only provided fields will be updated
     """
-    try:
-        # Build dynamic UPDATE query
-        updates = []
-        params = []
-        param_count = 1
-
-        if offer.name is not None:
-            updates.append(f"name = ${param_count}")
-            params.append(offer.name)
-            param_count += 1
-
-        if offer.description is not None:
-            updates.append(f"description = ${param_count}")
-            params.append(offer.description)
-            param_count += 1
-
-        if offer.offer_type is not None:
-            updates.append(f"offer_type = ${param_count}")
-            params.append(offer.offer_type)
-            param_count += 1
-
-        if offer.destination_url is not None:
-            updates.append(f"destination_url = ${param_count}")
-            params.append(str(offer.destination_url))
-            param_count += 1
-
-        if offer.affiliate_slug is not None:
-            updates.append(f"affiliate_slug = ${param_count}")
-            params.append(offer.affiliate_slug)
-            param_count += 1
-
-        if offer.status is not None:
-            updates.append(f"status = ${param_count}")
-            params.append(offer.status)
-            param_count += 1
-
-        if offer.start_date is not None:
-            updates.append(f"start_date = ${param_count}")
-            params.append(offer.start_date)
-            param_count += 1
-
-        if offer.end_date is not None:
-            updates.append(f"end_date = ${param_count}")
-            params.append(offer.end_date)
-            param_count += 1
-
-        if offer.priority is not None:
-            updates.append(f"priority = ${param_count}")
-            params.append(offer.priority)
-            param_count += 1
-
-        if offer.weight is not None:
-            updates.append(f"weight = ${param_count}")
-            params.append(offer.weight)
-            param_count += 1
-
-        if not updates:
-            raise HTTPException(status_code=400, detail="No fields to update")
-
-        updates.append("updated_at = NOW()")
-        params.append(offer_id)
-
-        query = f"""
-            UPDATE promo_offers
-            SET {', '.join(updates)}
-            WHERE id = ${param_count}
-            RETURNING id, name, description, offer_type, destination_url, affiliate_slug, status,
-                      start_date, end_date, priority, weight,
-                      total_impressions, total_clicks, ctr,
-                      created_at, updated_at
-        """
+    fields = (
+        offer.name, offer.description, offer.offer_type,
+        str(offer.destination_url) if offer.destination_url is not None else None,
+        offer.affiliate_slug, offer.status, offer.start_date, offer.end_date,
+        offer.priority, offer.weight
+    )
+    if all(value is None for value in fields):
+        raise HTTPException(status_code=400, detail="No fields to update")
 
-        result = await database.fetchrow(query, *params)
+    result = await database.fetchrow(UPDATE_OFFER_SQL, *fields, offer_id)
 
-        if not result:
-            raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
+    if not result:
+        raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
 
-        logger.info(f"✅ Offer updated: {result['name']} (ID: {result['id']}) by {current_user['email']}")
+    invalidate_eligible_offers()
+    invalidate_offer_cache()
+    logger.info(f"✅ Offer updated: {result['name']} (ID: {result['id']}) by {current_user['email']}")
 
-        return dict(result)
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to update offer {offer_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to update offer: {str(e)}")
+    return dict(result)
 
 
 @app.delete("/api/v1/offers/{offer_id}", tags=["Offers"])
@@ -1005,47 +1362,76 @@ async def delete_offer(
     Cascades to delete all associated text variations and tracking data.
     NOTE: Images removed Oct 18, 2025 - newsletter promo system is text-only.
     """
-    try:
-        # Get offer name before deletion
-        offer = await database.fetchrow(
-            "SELECT name FROM promo_offers WHERE id = $1",
-            offer_id
-        )
-
-        if not offer:
-            raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
-
-        await database.execute(
-            "DELETE FROM promo_offers WHERE id = $1",
-            offer_id
-        )
-
-        logger.info(f"✅ Offer deleted: {offer['name']} (ID: {offer_id}) by {current_user['email']}")
+    # Delete and get the name back in one round-trip (no row = not found)
+    offer = await database.fetchrow(
+        "DELETE FROM promo_offers WHERE id = $1 RETURNING name",
+        offer_id
+    )
 
-        return {
-            "success": True,
-            "message": f"Offer '{offer['name']}' deleted successfully"
-        }
+    if not offer:
+        raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to delete offer {offer_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to delete offer: {str(e)}")
+    invalidate_eligible_offers()
+    invalidate_offer_cache()
+    _variation_offer_cache.clear()  # its variations are gone (ON DELETE CASCADE)
+    logger.info(f"✅ Offer deleted: {offer['name']} (ID: {offer_id}) by {current_user['email']}")
+
+    return {
+        "success": True,
+        "message": f"Offer '{offer['name']}' deleted successfully"
+    }
 
 
 # ============================================================================
 # Newsletter Preview Endpoint
 # ============================================================================
 
+# Newsletter preview page, read and parsed once at import. string.Template
+# ($name placeholders) leaves the CSS braces alone; the four per-request
+# values are HTML-escaped before substitution.
+_PREVIEW_TEMPLATE = Template(
+    (Path(__file__).parent / "templates" / "newsletter_preview.html").read_text(encoding="utf-8")
+)
+
+
+# Preview offer + text lookups. Two fixed statements rather than one with
+# "$2 IS NULL OR ..." branches, so each keeps an index-friendly plan.
+PREVIEW_WITH_TEXT_SQL = """
+        SELECT o.id, o.name, o.description, o.destination_url,
+               t.id AS text_id, t.text_content, t.cta_text
+        FROM promo_offers o
+        LEFT JOIN LATERAL (
+            SELECT id, text_content, cta_text
+            FROM promo_text_variations
+            WHERE id = $2 AND offer_id = o.id
+        ) t ON TRUE
+        WHERE o.id = $1
+"""
+
+PREVIEW_FIRST_APPROVED_SQL = """
+        SELECT o.id, o.name, o.description, o.destination_url,
+               t.id AS text_id, t.text_content, t.cta_text
+        FROM promo_offers o
+        LEFT JOIN LATERAL (
+            SELECT id, text_content, cta_text
+            FROM promo_text_variations
+            WHERE offer_id = o.id AND approved = TRUE
+            ORDER BY created_at ASC
+            LIMIT 1
+        ) t ON TRUE
+        WHERE o.id = $1
+"""
+
+
 @app.get("/api/v1/promo/preview/{offer_id}", tags=["Preview"])
 @limiter.limit("50/minute")  # Moderate limit for preview generation
 async def preview_newsletter(
     request: Request,
     offer_id: int,
     text_id: int = None,
+    format: str = "json",
     current_user = Depends(get_current_user),
-    database: Database = Depends(get_db)
+    database: Database = Depends(get_db_conn)
 ):
     """
     Preview how a promotional offer will look in the newsletter (TEXT-ONLY)
@@ -1053,272 +1439,117 @@ async def preview_newsletter(
     If text_id is not provided, uses first approved text variation.
     Returns HTML ready to be displayed in an iframe or new window.
 
+    Response format:
+    - format=json (default): {"html": ..., "offer": ..., "text_used": ...}
+    - format=html: the page itself (text/html), offer and text variation
+      ids in the X-Offer-Id / X-Text-Id headers - no JSON escaping of the
+      whole page, and usable directly as an iframe src
+
     NOTE: Images removed Oct 18, 2025 - newsletter promo system is text-only.
     """
-    try:
-        # Get offer details
-        offer = await database.fetchrow("""
-            SELECT id, name, description, destination_url
-            FROM promo_offers
-            WHERE id = $1
-        """, offer_id)
-
-        if not offer:
-            raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
-
-        # Get text variation (use provided ID or first approved text variation)
-        # WHY: Text-only promo system (images removed Oct 18, 2025)
-        if text_id:
-            text = await database.fetchrow("""
-                SELECT text_content, cta_text
-                FROM promo_text_variations
-                WHERE id = $1 AND offer_id = $2
-            """, text_id, offer_id)
-        else:
-            text = await database.fetchrow("""
-                SELECT text_content, cta_text
-                FROM promo_text_variations
-                WHERE offer_id = $1 AND approved = TRUE
-                ORDER BY created_at ASC
-                LIMIT 1
-            """, offer_id)
-
-        # VALIDATION: Ensure offer has approved text variation
-        # WHY: Can't preview newsletter without text content
-        if not text:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "error": "Missing content",
-                    "message": "This offer needs at least one approved text variation",
-                    "has_text": False
-                }
-            )
-
-        # Generate preview HTML (newsletter template)
-        preview_html = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Newsletter Preview: {offer['name']}</title>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background: #f4f4f4;
-            margin: 0;
-            padding: 20px;
-        }}
-        .newsletter-container {{
-            max-width: 600px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 8px;
-            overflow: hidden;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px 20px;
-            text-align: center;
-        }}
-        .header h1 {{
-            margin: 0;
-            font-size: 28px;
-            font-weight: 700;
-        }}
-        .header p {{
-            margin: 10px 0 0 0;
-            opacity: 0.9;
-            font-size: 14px;
-        }}
-        .promo-section {{
-            padding: 30px 20px;
-            background: linear-gradient(to bottom, #f8f9ff 0%, white 100%);
-            border-bottom: 3px solid #667eea;
-        }}
-        .promo-label {{
-            display: inline-block;
-            background: #667eea;
-            color: white;
-            padding: 6px 12px;
-            border-radius: 4px;
-            font-size: 12px;
-            font-weight: 600;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            margin-bottom: 15px;
-        }}
-        .promo-text {{
-            font-size: 16px;
-            line-height: 1.8;
-            color: #2d3748;
-            margin-bottom: 20px;
-        }}
-        .promo-cta {{
-            display: inline-block;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 14px 32px;
-            text-decoration: none;
-            border-radius: 6px;
-            font-weight: 600;
-            font-size: 16px;
-            transition: transform 0.2s, box-shadow 0.2s;
-            box-shadow: 0 4px 12px rgba(102, 126, 234, 0.4);
-        }}
-        .promo-cta:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(102, 126, 234, 0.5);
-        }}
-        .content-section {{
-            padding: 30px 20px;
-        }}
-        .content-section h2 {{
-            color: #1a202c;
-            margin-top: 0;
-            font-size: 24px;
-        }}
-        .article {{
-            margin-bottom: 25px;
-            padding-bottom: 25px;
-            border-bottom: 1px solid #e2e8f0;
-        }}
-        .article:last-child {{
-            border-bottom: none;
-        }}
-        .article h3 {{
-            color: #2d3748;
-            margin: 0 0 8px 0;
-            font-size: 18px;
-        }}
-        .article p {{
-            color: #4a5568;
-            margin: 0 0 10px 0;
-            font-size: 14px;
-        }}
-        .article a {{
-            color: #667eea;
-            text-decoration: none;
-            font-weight: 600;
-            font-size: 14px;
-        }}
-        .footer {{
-            background: #2d3748;
-            color: #cbd5e0;
-            padding: 30px 20px;
-            text-align: center;
-            font-size: 13px;
-        }}
-        .preview-badge {{
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            background: #f59e0b;
-            color: white;
-            padding: 10px 20px;
-            border-radius: 6px;
-            font-weight: 600;
-            font-size: 14px;
-            box-shadow: 0 4px 12px rgba(245, 158, 11, 0.4);
-            z-index: 1000;
-        }}
-    </style>
-</head>
-<body>
-    <div class="preview-badge">📧 PREVIEW MODE</div>
-
-    <div class="newsletter-container">
-        <!-- Header -->
-        <div class="header">
-            <h1>AI Daily Post</h1>
-            <p>Monday, October 16, 2025 | Your Daily AI News Briefing</p>
-        </div>
-
-        <!-- Promotional Section -->
-        <div class="promo-section">
-            <span class="promo-label">⭐ Featured</span>
-
-            <!-- Image removed Oct 18, 2025: Text-only promo system -->
-
-            <div class="promo-text">
-                {text['text_content']}
-            </div>
-
-            <a href="{offer['destination_url']}" class="promo-cta">
-                {text['cta_text'] or 'Learn More →'}
-            </a>
-        </div>
-
-        <!-- Sample Newsletter Content -->
-        <div class="content-section">
-            <h2>📰 Today's Top Stories</h2>
-
-            <div class="article">
-                <h3>OpenAI Announces GPT-5 Breakthrough</h3>
-                <p>OpenAI has unveiled significant improvements in its latest language model, featuring enhanced reasoning capabilities and multimodal understanding.</p>
-                <a href="#">Read More →</a>
-            </div>
-
-            <div class="article">
-                <h3>Meta Releases Open-Source AI Research Tools</h3>
-                <p>Meta's AI research division has open-sourced a suite of tools designed to accelerate machine learning research and development.</p>
-                <a href="#">Read More →</a>
-            </div>
-
-            <div class="article">
-                <h3>AI Regulation Framework Gains Support</h3>
-                <p>The European Union's proposed AI Act receives backing from major tech companies, setting new standards for AI development.</p>
-                <a href="#">Read More →</a>
-            </div>
-        </div>
-
-        <!-- Footer -->
-        <div class="footer">
-            <p><strong>AI Daily Post</strong></p>
-            <p>Curated AI news delivered to your inbox every weekday</p>
-            <p style="margin-top: 15px; opacity: 0.7;">© 2025 AI Daily Post. All rights reserved.</p>
-        </div>
-    </div>
-</body>
-</html>
-        """
-
-        logger.info(f"📧 Preview generated for offer {offer_id} by {current_user['email']}")
+    # Offer and text variation in one round-trip (use provided text ID or
+    # first approved text variation). LEFT JOIN: no row = offer not found,
+    # NULL text columns = no matching text.
+    # WHY: Text-only promo system (images removed Oct 18, 2025)
+    if text_id:
+        row = await database.fetchrow(PREVIEW_WITH_TEXT_SQL, offer_id, text_id)
+    else:
+        row = await database.fetchrow(PREVIEW_FIRST_APPROVED_SQL, offer_id)
+
+    if not row:
+        raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
+
+    offer = {
+        "id": row['id'],
+        "name": row['name'],
+        "description": row['description'],
+        "destination_url": row['destination_url']
+    }
+    text = None
+    if row['text_id'] is not None:
+        text = {
+            "id": row['text_id'],
+            "text_content": row['text_content'],
+            "cta_text": row['cta_text']
+        }
 
-        # RESPONSE: Return preview HTML and metadata (text-only)
-        # WHY: Newsletter promo system is text-only (images removed Oct 18, 2025)
-        return JSONResponse(
+    # VALIDATION: Ensure offer has approved text variation
+    # WHY: Can't preview newsletter without text content
+    if not text:
+        return ORJSONResponse(
+            status_code=400,
             content={
-                "html": preview_html,
-                "offer": dict(offer),
-                "text_used": dict(text)
+                "error": "Missing content",
+                "message": "This offer needs at least one approved text variation",
+                "has_text": False
             }
         )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to generate preview for offer {offer_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate preview: {str(e)}")
+    # Generate preview HTML (newsletter template, values HTML-escaped)
+    preview_html = _PREVIEW_TEMPLATE.substitute(
+        offer_name=escape(offer['name']),
+        text_content=escape(text['text_content']),
+        destination_url=escape(offer['destination_url'] or ''),
+        cta_text=escape(text['cta_text'] or 'Learn More →')
+    )
+
+    logger.info(f"📧 Preview generated for offer {offer_id} by {current_user['email']}")
+
+    if format == "html":
+        return HTMLResponse(
+            content=preview_html,
+            headers={"X-Offer-Id": str(offer['id']), "X-Text-Id": str(text['id'])}
+        )
+
+    # RESPONSE: Return preview HTML and metadata (text-only)
+    # WHY: Newsletter promo system is text-only (images removed Oct 18, 2025)
+    return ORJSONResponse(
+        content={
+            "html": preview_html,
+            "offer": offer,
+            "text_used": text
+        }
+    )
 
 
 # ============================================================================
 # Text Generation Endpoints (Ollama AI)
 # ============================================================================
 
+COMPLETE_GENERATION_JOB_SQL = """
+    UPDATE promo_generation_jobs
+    SET status = 'completed',
+        generated_count = $1,
+        completed_at = NOW(),
+        duration_seconds = EXTRACT(EPOCH FROM (NOW() - started_at))::INT
+    WHERE id = $2
+"""
+
+
+async def finalize_generation_job(job_id: int, generated_count: int) -> None:
+    """
+    Mark a text generation job completed (runs as a response background task)
+
+    Uses the db singleton - its own pooled connection, not the request's.
+    A failure here only leaves the job row at 'processing'; the generated
+    variations are already stored, so it is logged rather than raised.
+    """
+    try:
+        await db.execute(COMPLETE_GENERATION_JOB_SQL, generated_count, job_id)
+    except Exception as e:
+        logger.warning("⚠️ Failed to finalize generation job %s: %s", job_id, e)
+
+
 @app.post("/api/v1/offers/{offer_id}/generate-text", tags=["Text"])
 @limiter.limit("20/hour")  # More generous than images but still limited for AI operations
 async def generate_text_variations(
     request: Request,
     offer_id: int,
     gen_request: TextGenerationRequest,
+    background_tasks: BackgroundTasks,
     current_user = Depends(get_current_user),
-    database: Database = Depends(get_db)
+    database: Database = Depends(get_db),
+    ollama: OllamaService = Depends(get_ollama)
 ):
     """
     Generate promotional text variations using Ollama AI
@@ -1326,97 +1557,91 @@ async def generate_text_variations(
     Creates multiple text variations with different wording but same message.
     Typically completes in 10-20 seconds.
     """
-    try:
-        # Verify offer exists and get offer type
-        offer = await database.fetchrow(
-            "SELECT id, name, description, destination_url, offer_type FROM promo_offers WHERE id = $1",
-            offer_id
-        )
-
-        if not offer:
-            raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
-
-        # Create generation job record
-        import json
-        job = await database.fetchrow("""
+    # Load the offer and create its generation job record in one statement:
+    # the INSERT only runs if the offer exists, so no row = 404
+    # (parameters dict is encoded by the pool's jsonb codec)
+    offer = await database.fetchrow("""
+        WITH offer AS (
+            SELECT id, name, description, destination_url, offer_type
+            FROM promo_offers
+            WHERE id = $1
+        ), job AS (
             INSERT INTO promo_generation_jobs (
                 offer_id, job_type, status, parameters,
                 started_at, created_at
-            ) VALUES ($1, 'text', 'processing', $2::jsonb, NOW(), NOW())
+            )
+            SELECT id, 'text', 'processing', $2::jsonb, NOW(), NOW()
+            FROM offer
             RETURNING id
-        """, offer_id, json.dumps(gen_request.dict()))
+        )
+        SELECT offer.*, job.id AS job_id
+        FROM offer, job
+    """, offer_id, gen_request.dict())
 
-        job_id = job['id']
+    if not offer:
+        raise HTTPException(status_code=404, detail=f"Offer {offer_id} not found")
 
-        try:
-            # Initialize Ollama service
-            ollama = OllamaService()
-
-            # Generate text variations with hardcoded best-practice defaults
-            logger.info(f"✍️  Starting text generation for offer {offer_id} ({offer['offer_type']}) - {gen_request.num_variations} variations")
-            variations = await ollama.generate_text_variations(
-                offer_name=offer['name'],
-                offer_description=offer['description'] or '',
-                destination_url=str(offer['destination_url']),
-                offer_type=offer['offer_type'],  # Determines prompt strategy (regular vs coffee)
-                tone="friendly",  # Hardcoded: Best practice for newsletters (81% preference)
-                length_category="medium",  # Hardcoded: 60-80 words optimal for CTR
-                num_variations=gen_request.num_variations
+    job_id = offer['job_id']
+
+    try:
+        # Generate text variations with hardcoded best-practice defaults
+        logger.info(f"✍️  Starting text generation for offer {offer_id} ({offer['offer_type']}) - {gen_request.num_variations} variations")
+        variations = await ollama.generate_text_variations(
+            offer_name=offer['name'],
+            offer_description=offer['description'] or '',
+            destination_url=str(offer['destination_url']),
+            offer_type=offer['offer_type'],  # Determines prompt strategy (regular vs coffee)
+            tone="friendly",  # Hardcoded: Best practice for newsletters (81% preference)
+            length_category="medium",  # Hardcoded: 60-80 words optimal for CTR
+            num_variations=gen_request.num_variations
+        )
+
+        # Store all variations (hardcoded tone/length) in one INSERT ... unnest:
+        # one round-trip regardless of num_variations
+        generated_texts = await database.fetch("""
+            INSERT INTO promo_text_variations (
+                offer_id, headline, text_content, cta_text,
+                tone, length_category, approved,
+                created_at
             )
+            SELECT $1, v.headline, v.text_content, v.cta_text,
+                   'friendly', 'medium', FALSE, NOW()
+            FROM unnest($2::text[], $3::text[], $4::text[])
+                 WITH ORDINALITY AS v(headline, text_content, cta_text, n)
+            ORDER BY v.n
+            RETURNING id, headline, text_content, cta_text, approved, created_at
+        """, offer_id,
+            [variation.get('headline') for variation in variations],
+            [variation.get('text', '') for variation in variations],
+            [variation.get('cta', '') for variation in variations],
+            dicts=True)
+
+        # Mark the job completed after the response is sent - the variations
+        # are already committed, the job row is bookkeeping only
+        background_tasks.add_task(finalize_generation_job, job_id, len(generated_texts))
+
+        logger.info(f"✅ Generated {len(generated_texts)} text variations for offer {offer_id} by {current_user['email']}")
 
-            # Store variations in database with hardcoded tone/length
-            generated_texts = []
-            for variation in variations:
-                db_text = await database.fetchrow("""
-                    INSERT INTO promo_text_variations (
-                        offer_id, headline, text_content, cta_text,
-                        tone, length_category, approved,
-                        created_at
-                    ) VALUES ($1, $2, $3, $4, 'friendly', 'medium', FALSE, NOW())
-                    RETURNING id, headline, text_content, cta_text, approved, created_at
-                """, offer_id, variation.get('headline'), variation.get('text', ''),
-                    variation.get('cta', ''))
-
-                generated_texts.append(dict(db_text))
-
-            # Update job status
-            await database.execute("""
-                UPDATE promo_generation_jobs
-                SET status = 'completed',
-                    generated_count = $1,
-                    completed_at = NOW(),
-                    duration_seconds = EXTRACT(EPOCH FROM (NOW() - started_at))::INT
-                WHERE id = $2
-            """, len(generated_texts), job_id)
-
-            logger.info(f"✅ Generated {len(generated_texts)} text variations for offer {offer_id} by {current_user['email']}")
-
-            return {
-                "success": True,
-                "offer_id": offer_id,
-                "job_id": job_id,
-                "variations_generated": len(generated_texts),
-                "variations": generated_texts
-            }
+        return {
+            "success": True,
+            "offer_id": offer_id,
+            "job_id": job_id,
+            "variations_generated": len(generated_texts),
+            "variations": generated_texts
+        }
 
-        except Exception as gen_error:
-            # Update job with error
-            await database.execute("""
-                UPDATE promo_generation_jobs
-                SET status = 'failed',
-                    error_message = $1,
-                    completed_at = NOW(),
-                    duration_seconds = EXTRACT(EPOCH FROM (NOW() - started_at))::INT
-                WHERE id = $2
-            """, str(gen_error), job_id)
-
-            raise gen_error
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Text generation failed for offer {offer_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Text generation failed: {str(e)}")
+    except Exception as gen_error:
+        # Update job with error
+        await database.execute("""
+            UPDATE promo_generation_jobs
+            SET status = 'failed',
+                error_message = $1,
+                completed_at = NOW(),
+                duration_seconds = EXTRACT(EPOCH FROM (NOW() - started_at))::INT
+            WHERE id = $2
+        """, str(gen_error), job_id)
+
+        raise gen_error
 
 
 @app.get("/api/v1/offers/{offer_id}/texts", response_model=List[TextVariationResponse], tags=["Text"])
@@ -1433,28 +1658,23 @@ async def list_offer_texts(
 
     Optional filter to show only approved texts
     """
-    try:
-        query = """
-            SELECT id, offer_id, headline, text_content, cta_text,
-                   tone, length_category, approved,
-                   times_used, total_clicks, ctr,
-                   created_at
-            FROM promo_text_variations
-            WHERE offer_id = $1
-        """
-
-        if approved_only:
-            query += " AND approved = TRUE"
-
-        query += " ORDER BY created_at DESC"
+    query = """
+        SELECT id, offer_id, headline, text_content, cta_text,
+               tone, length_category, approved,
+               times_used, total_clicks, ctr,
+               created_at
+        FROM promo_text_variations
+        WHERE offer_id = $1
+    """
 
-        texts = await database.fetch(query, offer_id)
+    if approved_only:
+        query += " AND approved = TRUE"
 
-        return [dict(text) for text in texts]
+    query += " ORDER BY created_at DESC"
 
-    except Exception as e:
-        logger.error(f"Failed to list texts for offer {offer_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to list texts: {str(e)}")
+    # Trusted rows: serialize directly, skipping per-row model validation
+    rows = await database.fetch(query, offer_id)
+    return Response(content=records_to_json(rows), media_type="application/json")
 
 
 @app.put("/api/v1/texts/{text_id}/approve", response_model=TextVariationResponse, tags=["Text"])
@@ -1471,30 +1691,42 @@ async def approve_text(
 
     Only approved texts can be used in newsletters
     """
-    try:
-        result = await database.fetchrow("""
-            UPDATE promo_text_variations
-            SET approved = $1
-            WHERE id = $2
-            RETURNING id, offer_id, headline, text_content, cta_text,
-                      tone, length_category, approved,
-                      times_used, total_clicks, ctr,
-                      created_at
-        """, approve, text_id)
-
-        if not result:
-            raise HTTPException(status_code=404, detail=f"Text {text_id} not found")
-
-        action = "approved" if approve else "unapproved"
-        logger.info(f"✅ Text {text_id} {action} by {current_user['email']}")
-
-        return dict(result)
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to approve text {text_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to approve text: {str(e)}")
+    result = await database.fetchrow("""
+        UPDATE promo_text_variations
+        SET approved = $1
+        WHERE id = $2
+        RETURNING id, offer_id, headline, text_content, cta_text,
+                  tone, length_category, approved,
+                  times_used, total_clicks, ctr,
+                  created_at
+    """, approve, text_id)
+
+    if not result:
+        raise HTTPException(status_code=404, detail=f"Text {text_id} not found")
+
+    action = "approved" if approve else "unapproved"
+    invalidate_eligible_offers()
+    logger.info(f"✅ Text {text_id} {action} by {current_user['email']}")
+
+    return dict(result)
+
+
+# Inline text edit: text_content and cta_text always set, headline only when
+# provided (NULL keeps the current one) - one fixed SQL text for every call
+UPDATE_TEXT_SQL = """
+        UPDATE promo_text_variations
+        SET text_content = $1,
+            cta_text = $2,
+            headline = COALESCE($3, headline),
+            updated_at = NOW()
+        WHERE id = $4
+        RETURNING id, offer_id, headline, text_content, cta_text,
+                  tone, length_category, approved,
+                  impressions as times_used,
+                  clicks as total_clicks,
+                  ctr,
+                  created_at, updated_at
+"""
 
 
 @app.put("/api/v1/texts/{text_id}", response_model=TextVariationResponse, tags=["Text"])
@@ -1549,55 +1781,19 @@ async def update_text(
 
     **Response:** Updated TextVariationResponse with all fields
     """
-    try:
-        # Verify text exists
-        existing = await database.fetchrow(
-            "SELECT id, offer_id FROM promo_text_variations WHERE id = $1",
-            text_id
-        )
-
-        if not existing:
-            raise HTTPException(status_code=404, detail=f"Text variation {text_id} not found")
-
-        # Build UPDATE query with new v3.5.0 fields
-        update_fields = ["text_content = $1", "cta_text = $2", "updated_at = NOW()"]
-        params = [update_data.text_content, update_data.cta_text]
-        param_count = 3
-
-        # Add optional headline field
-        if update_data.headline is not None:
-            update_fields.append(f"headline = ${param_count}")
-            params.append(update_data.headline)
-            param_count += 1
-
-        # Add text_id as last parameter
-        params.append(text_id)
-
-        # Execute UPDATE
-        query = f"""
-            UPDATE promo_text_variations
-            SET {', '.join(update_fields)}
-            WHERE id = ${param_count}
-            RETURNING id, offer_id, headline, text_content, cta_text,
-                      tone, length_category, approved,
-                      impressions as times_used,
-                      clicks as total_clicks,
-                      ctr,
-                      created_at, updated_at
-        """
-
-        result = await database.fetchrow(query, *params)
+    # One fixed UPDATE (headline kept when not provided); no row = not found
+    result = await database.fetchrow(
+        UPDATE_TEXT_SQL,
+        update_data.text_content, update_data.cta_text, update_data.headline, text_id
+    )
 
-        logger.info(f"✅ Text {text_id} updated by {current_user['email']} (inline editing)")
-        logger.debug(f"Updated fields: headline={'Yes' if update_data.headline else 'No'}, text_content=Yes, cta_text=Yes")
+    if not result:
+        raise HTTPException(status_code=404, detail=f"Text variation {text_id} not found")
 
-        return dict(result)
+    logger.info(f"✅ Text {text_id} updated by {current_user['email']} (inline editing)")
+    logger.debug(f"Updated fields: headline={'Yes' if update_data.headline else 'No'}, text_content=Yes, cta_text=Yes")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to update text {text_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to update text: {str(e)}")
+    return dict(result)
 
 
 @app.delete("/api/v1/texts/{text_id}", tags=["Text"])
@@ -1613,34 +1809,23 @@ async def delete_text(
 
     Removes from database
     """
-    try:
-        # Get text info before deletion
-        text = await database.fetchrow(
-            "SELECT offer_id, text_content FROM promo_text_variations WHERE id = $1",
-            text_id
-        )
-
-        if not text:
-            raise HTTPException(status_code=404, detail=f"Text {text_id} not found")
-
-        # Delete from database
-        await database.execute(
-            "DELETE FROM promo_text_variations WHERE id = $1",
-            text_id
-        )
+    # Delete from database (no row returned = not found)
+    text = await database.fetchrow(
+        "DELETE FROM promo_text_variations WHERE id = $1 RETURNING offer_id",
+        text_id
+    )
 
-        logger.info(f"✅ Text {text_id} deleted by {current_user['email']}")
+    if not text:
+        raise HTTPException(status_code=404, detail=f"Text {text_id} not found")
 
-        return {
-            "success": True,
-            "message": f"Text variation deleted successfully"
-        }
+    invalidate_eligible_offers()
+    _variation_offer_cache.pop(text_id, None)
+    logger.info(f"✅ Text {text_id} deleted by {current_user['email']}")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to delete text {text_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to delete text: {str(e)}")
+    return {
+        "success": True,
+        "message": f"Text variation deleted successfully"
+    }
 
 
 @app.post("/api/v1/texts/{text_id}/regenerate", tags=["Text"])
@@ -1649,7 +1834,8 @@ async def regenerate_text(
     request: Request,
     text_id: int,
     current_user = Depends(get_current_user),
-    database: Database = Depends(get_db)
+    database: Database = Depends(get_db),
+    ollama: OllamaService = Depends(get_ollama)
 ):
     """
     Regenerate a single text variation using AI - v3.5.0
@@ -1699,81 +1885,77 @@ async def regenerate_text(
     **Error Cases:**
     - 404: Text variation not found
     - 500: AI generation failed
+    - 503: Text generation at capacity (retry after Retry-After seconds)
     - 429: Rate limit exceeded (20/hour)
     """
-    try:
-        # Get original text's offer details
-        text = await database.fetchrow("""
-            SELECT tv.id, tv.offer_id,
-                   o.name, o.description, o.destination_url, o.offer_type
-            FROM promo_text_variations tv
-            JOIN promo_offers o ON tv.offer_id = o.id
-            WHERE tv.id = $1
-        """, text_id)
-
-        if not text:
-            raise HTTPException(status_code=404, detail=f"Text variation {text_id} not found")
-
-        offer_id = text['offer_id']
-        offer_type = text['offer_type']
-
-        logger.info(f"🔄 Regenerating text {text_id} for offer {offer_id} ({offer_type})")
-
-        # Generate 1 new variation using Ollama AI
-        ollama = OllamaService()
-        variations = await ollama.generate_text_variations(
-            offer_name=text['name'],
-            offer_description=text['description'] or '',
-            destination_url=str(text['destination_url']),
-            offer_type=offer_type,
-            tone="friendly",  # Hardcoded best practice
-            length_category="medium",  # Hardcoded best practice
-            num_variations=1  # Only generate 1 replacement
-        )
+    # Get original text's offer details
+    text = await database.fetchrow("""
+        SELECT tv.id, tv.offer_id,
+               o.name, o.description, o.destination_url, o.offer_type
+        FROM promo_text_variations tv
+        JOIN promo_offers o ON tv.offer_id = o.id
+        WHERE tv.id = $1
+    """, text_id)
+
+    if not text:
+        raise HTTPException(status_code=404, detail=f"Text variation {text_id} not found")
+
+    offer_id = text['offer_id']
+    offer_type = text['offer_type']
+
+    logger.info(f"🔄 Regenerating text {text_id} for offer {offer_id} ({offer_type})")
+
+    # Generate 1 new variation using Ollama AI
+    variations = await ollama.generate_text_variations(
+        offer_name=text['name'],
+        offer_description=text['description'] or '',
+        destination_url=str(text['destination_url']),
+        offer_type=offer_type,
+        tone="friendly",  # Hardcoded best practice
+        length_category="medium",  # Hardcoded best practice
+        num_variations=1  # Only generate 1 replacement
+    )
 
-        if not variations or len(variations) == 0:
-            raise HTTPException(status_code=500, detail="AI generation failed to produce variation")
-
-        new_text = variations[0]
-
-        # Replace old text with new AI-generated text
-        result = await database.fetchrow("""
-            UPDATE promo_text_variations
-            SET headline = $1,
-                text_content = $2,
-                cta_text = $3,
-                tone = 'friendly',
-                length_category = 'medium',
-                approved = FALSE
-            WHERE id = $4
-            RETURNING id, offer_id, headline, text_content, cta_text,
-                      tone, length_category, approved,
-                      created_at
-        """,
-            new_text.get('headline'),
-            new_text.get('text'),
-            new_text.get('cta'),
-            text_id
-        )
+    if not variations or len(variations) == 0:
+        raise HTTPException(status_code=500, detail="AI generation failed to produce variation")
+
+    new_text = variations[0]
+
+    # Replace old text with new AI-generated text
+    result = await database.fetchrow("""
+        UPDATE promo_text_variations
+        SET headline = $1,
+            text_content = $2,
+            cta_text = $3,
+            tone = 'friendly',
+            length_category = 'medium',
+            approved = FALSE
+        WHERE id = $4
+        RETURNING id, offer_id, headline, text_content, cta_text,
+                  tone, length_category, approved,
+                  created_at
+    """,
+        new_text.get('headline'),
+        new_text.get('text'),
+        new_text.get('cta'),
+        text_id
+    )
 
-        logger.info(f"✅ Text {text_id} regenerated successfully by {current_user['email']}")
+    # The text is unapproved again - drop it from the cached selection lists
+    invalidate_eligible_offers()
 
-        return {
-            "success": True,
-            "text_id": text_id,
-            "variation": {
-                "headline": new_text.get('headline'),
-                "text": new_text.get('text'),
-                "cta": new_text.get('cta')
-            },
-            "updated_record": dict(result)
-        }
+    logger.info(f"✅ Text {text_id} regenerated successfully by {current_user['email']}")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to regenerate text {text_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to regenerate text: {str(e)}")
+    return {
+        "success": True,
+        "text_id": text_id,
+        "variation": {
+            "headline": new_text.get('headline'),
+            "text": new_text.get('text'),
+            "cta": new_text.get('cta')
+        },
+        "updated_record": dict(result)
+    }
 
 
 # ============================================================================
@@ -1798,6 +1980,119 @@ async def regenerate_text(
 # - GDPR compliant (aggregate data only)
 # ============================================================================
 
+# Tracking rows are buffered in-process and COPY'd in batches (every 100ms or
+# 1000 rows). The per-row counter triggers were dropped in migration 005, so
+# each flush bumps the denormalized counters once per variation/offer.
+TRACKING_FLUSH_INTERVAL = 0.1
+TRACKING_MAX_BATCH = 1000
+
+# tracked_at/tracked_date and clicked_at/clicked_date are left to their
+# column defaults (NOW() / CURRENT_DATE), exactly as the per-row INSERT did -
+# the timestamp is the flush time, at most one flush interval late.
+IMPRESSION_COLUMNS = (
+    "offer_id", "variation_id", "newsletter_send_id", "ip_hash", "subscriber_count"
+)
+CLICK_COLUMNS = (
+    "offer_id", "variation_id", "ip_hash", "user_agent", "referrer", "utm_source"
+)
+
+# $1 = one id per tracked row; each statement adds that id's row count
+BUMP_VARIATION_IMPRESSIONS_SQL = """
+    UPDATE promo_text_variations v
+    SET impressions = v.impressions + c.n
+    FROM (SELECT id, COUNT(*) AS n FROM unnest($1::int[]) AS t(id) GROUP BY id) c
+    WHERE v.id = c.id
+"""
+BUMP_OFFER_IMPRESSIONS_SQL = """
+    UPDATE promo_offers o
+    SET total_impressions = o.total_impressions + c.n
+    FROM (SELECT id, COUNT(*) AS n FROM unnest($1::int[]) AS t(id) GROUP BY id) c
+    WHERE o.id = c.id
+"""
+BUMP_VARIATION_CLICKS_SQL = """
+    UPDATE promo_text_variations v
+    SET clicks = v.clicks + c.n
+    FROM (SELECT id, COUNT(*) AS n FROM unnest($1::int[]) AS t(id) GROUP BY id) c
+    WHERE v.id = c.id
+"""
+BUMP_OFFER_CLICKS_SQL = """
+    UPDATE promo_offers o
+    SET total_clicks = o.total_clicks + c.n
+    FROM (SELECT id, COUNT(*) AS n FROM unnest($1::int[]) AS t(id) GROUP BY id) c
+    WHERE o.id = c.id
+"""
+
+
+# variation_id -> offer_id, used to validate every tracked row before it is
+# queued (and to fill offer_id for clicks that arrive without it). A variation
+# never moves to another offer, so entries only go stale when the variation is
+# deleted (delete_text / delete_offer evict; other workers may keep a stale
+# entry - the batch writer then rejects just that row at flush time).
+VARIATION_OFFER_SQL = "SELECT offer_id FROM promo_text_variations WHERE id = $1"
+_variation_offer_cache: LRUCache = LRUCache(maxsize=10_000)
+
+
+async def get_variation_offer_id(database: Database, variation_id: int) -> Optional[int]:
+    """Offer id for a text variation (cached), or None if it doesn't exist"""
+    offer_id = _variation_offer_cache.get(variation_id)
+    if offer_id is None:
+        offer_id = await database.fetchval(VARIATION_OFFER_SQL, variation_id)
+        # Only cache hits - an unknown id must be re-checked next time
+        if offer_id is not None:
+            _variation_offer_cache[variation_id] = offer_id
+    return offer_id
+
+
+async def resolve_tracked_offer(database: Database, variation_id: int, offer_id: Optional[int]) -> int:
+    """
+    Validate a tracking request's ids and return the variation's offer id
+
+    Rows are written in batches after the response, where one bad id would
+    abort the whole batch - so ids are checked here and rejected per request.
+
+    Raises:
+        HTTPException: 400 if the variation doesn't exist or belongs to
+            a different offer than the one given
+    """
+    variation_offer_id = await get_variation_offer_id(database, variation_id)
+
+    if variation_offer_id is None:
+        raise HTTPException(status_code=400, detail=f"Invalid variation_id: {variation_id}")
+
+    if offer_id and offer_id != variation_offer_id:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Variation {variation_id} does not belong to offer {offer_id}"
+        )
+
+    return variation_offer_id
+
+
+def hash_ip(ip_address: str) -> str:
+    """
+    One-way hash of a client IP for the tracking tables' ip_hash column
+
+    Only used to bucket repeat traffic (bot/fraud detection), so a 160-bit
+    BLAKE2b digest is plenty: 40 hex chars instead of SHA-256's 64, and
+    faster on short inputs. Rows written before the switch keep their
+    SHA-256 values.
+    """
+    return blake2b(ip_address.encode(), digest_size=20).hexdigest()
+
+
+impression_writer = CopyBatchWriter(
+    db, "promo_impression_tracking", IMPRESSION_COLUMNS,
+    counters=[(BUMP_VARIATION_IMPRESSIONS_SQL, 1), (BUMP_OFFER_IMPRESSIONS_SQL, 0)],
+    interval=TRACKING_FLUSH_INTERVAL, max_batch=TRACKING_MAX_BATCH
+)
+click_writer = CopyBatchWriter(
+    db, "promo_click_tracking", CLICK_COLUMNS,
+    counters=[(BUMP_VARIATION_CLICKS_SQL, 1), (BUMP_OFFER_CLICKS_SQL, 0)],
+    interval=TRACKING_FLUSH_INTERVAL, max_batch=TRACKING_MAX_BATCH,
+    flush_first=impression_writer  # impressions counted before the clicks on them
+)
+
+
 @app.post("/api/v1/promo/track-impression", status_code=204, tags=["Tracking"])
 @limiter.limit("200/minute")  # High limit for newsletter sends (multiple impressions per send)
 async def track_impression(
@@ -1820,10 +2115,10 @@ async def track_impression(
     1. Newsletter system calls GET /select-random to get promo
     2. Newsletter compiles HTML email with promo content
     3. Newsletter calls THIS endpoint to track impression
-    4. Backend writes to promo_impression_tracking table
-    5. Database trigger increments promo_text_variations.impressions
-    6. Database trigger recalculates CTR
-    7. Newsletter sends to subscribers
+    4. Backend queues the row; the next batch flush (<=100ms) COPYs it into
+       promo_impression_tracking and increments the impression counters
+    5. CTR follows (generated column)
+    6. Newsletter sends to subscribers
 
     CRITICAL REQUIREMENTS:
     - Response time MUST be <50ms (doesn't block newsletter send)
@@ -1831,7 +2126,7 @@ async def track_impression(
     - If tracking fails, newsletter STILL sends (fail-safe design)
 
     PRIVACY:
-    - IP address is SHA-256 hashed before storage (if provided)
+    - IP address is BLAKE2b hashed before storage (if provided)
     - No user identification or tracking
     - Only aggregate metrics collected
     - GDPR compliant
@@ -1849,86 +2144,58 @@ async def track_impression(
         204 No Content (success, no response body)
 
     Error Responses:
-        400: Invalid request (missing required fields)
-        500: Database error (logged, but newsletter continues sending)
+        400: Invalid request (missing required fields, unknown variation_id
+             or variation not belonging to offer_id)
+        (database errors happen in the batch flush - logged, never returned)
 
-    Database Impact:
-        - INSERT into promo_impression_tracking
-        - UPDATE promo_text_variations SET impressions = impressions + 1
-        - UPDATE promo_text_variations SET ctr = (clicks / impressions) * 100
+    Database Impact (batched, see impression_writer):
+        - COPY into promo_impression_tracking
+        - UPDATE promo_text_variations SET impressions = impressions + n
+        - UPDATE promo_offers SET total_impressions = total_impressions + n
+        - promo_text_variations.ctr follows (generated column, migration 004)
 
     Created: October 18, 2025
     """
-    try:
-        # STEP 1: Hash IP address for privacy (if provided)
-        # --------------------------------------------------
-        # WHY: GDPR compliance - never store plain IP addresses
-        # HOW: SHA-256 one-way hash (can't reverse to get real IP)
-        # USE CASE: Detect bot traffic, prevent fraud (not user tracking)
-        ip_hash = None
-        if tracking.ip_address:
-            import hashlib
-            ip_hash = hashlib.sha256(tracking.ip_address.encode()).hexdigest()
-            logger.debug(f"Hashed IP: {tracking.ip_address[:10]}... → {ip_hash[:10]}...")
-
-        # STEP 2: Insert impression record into database
-        # -----------------------------------------------
-        # WHY: Need permanent record of each impression for analytics
-        # DATABASE TRIGGER: Automatically increments variation.impressions counter
-        # PERFORMANCE: Single INSERT, ~10-20ms typical response time
-        await database.execute("""
-            INSERT INTO promo_impression_tracking (
-                offer_id,
-                variation_id,
-                newsletter_send_id,
-                ip_hash,
-                subscriber_count,
-                tracked_at,
-                tracked_date
-            ) VALUES ($1, $2, $3, $4, $5, NOW(), CURRENT_DATE)
-        """, tracking.offer_id, tracking.variation_id,
-             tracking.newsletter_send_id, ip_hash, tracking.subscriber_count)
-
-        # STEP 3: Log successful tracking (for debugging and monitoring)
-        # --------------------------------------------------------------
-        # WHY: Helps diagnose issues ("Was impression recorded?")
-        # EXAMPLE LOG: "✅ Tracked impression: offer=4, var=42, newsletter=2025-10-18-daily"
-        logger.info(
-            f"✅ Tracked impression: "
-            f"offer={tracking.offer_id}, "
-            f"variation={tracking.variation_id}, "
-            f"newsletter={tracking.newsletter_send_id or 'unknown'}"
-        )
-
-        # STEP 4: Return 204 No Content (fast, no response body)
-        # -------------------------------------------------------
-        # WHY 204? Standard for successful POST/PUT with no response data
-        # PERFORMANCE: No JSON serialization needed (faster than 200 OK)
-        # NEWSLETTER: Can ignore response (fire-and-forget pattern)
-        return Response(status_code=204)
-
-    except HTTPException:
-        # Re-raise HTTP exceptions (validation errors, etc.)
-        raise
+    # STEP 1: Validate variation/offer ids (cached lookup)
+    # ----------------------------------------------------
+    # WHY: The row is written later in a batch - a bad id must fail this
+    #      request with 400, not abort the batch with everyone else's rows
+    offer_id = await resolve_tracked_offer(database, tracking.variation_id, tracking.offer_id)
+
+    # STEP 2: Hash IP address for privacy (if provided)
+    # --------------------------------------------------
+    # WHY: GDPR compliance - never store plain IP addresses
+    # HOW: BLAKE2b one-way hash (can't reverse to get real IP)
+    # USE CASE: Detect bot traffic, prevent fraud (not user tracking)
+    ip_hash = hash_ip(tracking.ip_address) if tracking.ip_address else None
+
+    # STEP 3: Queue impression record for the next batch flush
+    # ---------------------------------------------------------
+    # WHY: A newsletter send posts thousands of impressions in a burst;
+    #      one COPY per batch replaces one INSERT round-trip per impression
+    # PERFORMANCE: No database work on the request path at all
+    impression_writer.add(
+        offer_id, tracking.variation_id, tracking.newsletter_send_id,
+        ip_hash, tracking.subscriber_count
+    )
 
-    except Exception as e:
-        # STEP 5: Error handling (log but don't fail newsletter)
-        # -------------------------------------------------------
-        # WHY CRITICAL: Newsletter MUST continue sending even if tracking fails
-        # BEHAVIOR: Log error, return 500, but newsletter ignores this
-        # MONITORING: Check logs for recurring impression tracking failures
-        logger.error(
-            f"❌ Failed to track impression: "
-            f"offer={tracking.offer_id}, "
-            f"variation={tracking.variation_id}, "
-            f"error={str(e)}"
-        )
+    # STEP 4: Log successful tracking (for debugging and monitoring)
+    # --------------------------------------------------------------
+    # WHY: Helps diagnose issues ("Was impression recorded?")
+    # EXAMPLE LOG: "✅ Tracked impression: offer=4, var=42, newsletter=2025-10-18-daily"
+    logger.info(
+        f"✅ Tracked impression: "
+        f"offer={offer_id}, "
+        f"variation={tracking.variation_id}, "
+        f"newsletter={tracking.newsletter_send_id or 'unknown'}"
+    )
 
-        # Return 500 but newsletter continues (has timeout)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to track impression: {str(e)}"
-        )
+    # STEP 5: Return 204 No Content (fast, no response body)
+    # -------------------------------------------------------
+    # WHY 204? Standard for successful POST/PUT with no response data
+    # PERFORMANCE: No JSON serialization needed (faster than 200 OK)
+    # NEWSLETTER: Can ignore response (fire-and-forget pattern)
+    return Response(status_code=204)
 
 
 @app.post("/api/v1/promo/track-click", status_code=204, tags=["Tracking"])
@@ -1953,10 +2220,10 @@ async def track_click(
     1. User clicks link: https://aidailypost.com/nocodemba?promo_var=42
     2. Affiliate redirect handler extracts promo_var=42 from URL
     3. Redirect handler calls THIS endpoint asynchronously
-    4. Backend writes to promo_click_tracking table (this endpoint)
-    5. Database trigger increments promo_text_variations.clicks
-    6. Database trigger recalculates CTR
-    7. User is redirected to destination (doesn't wait for tracking)
+    4. Backend queues the row; the next batch flush (<=100ms) COPYs it into
+       promo_click_tracking and increments the click counters
+    5. CTR follows (generated column)
+    6. User is redirected to destination (doesn't wait for tracking)
 
     CRITICAL REQUIREMENTS:
     - Response time MUST be <50ms (doesn't block redirect)
@@ -1965,7 +2232,7 @@ async def track_click(
     - Async call from redirect handler (asyncio.create_task)
 
     PRIVACY:
-    - IP address is SHA-256 hashed before storage (if provided)
+    - IP address is BLAKE2b hashed before storage (if provided)
     - user_agent helps detect mobile vs desktop (not user identification)
     - referrer shows email client type (not individual user)
     - No click-through tracking (don't track what happens after)
@@ -1985,13 +2252,15 @@ async def track_click(
         204 No Content (success, no response body)
 
     Error Responses:
-        400: Invalid request (missing required fields)
-        500: Database error (logged, but redirect continues)
+        400: Invalid request (missing required fields, unknown variation_id
+             or variation not belonging to offer_id)
+        (database errors in the batch flush are logged, never returned)
 
-    Database Impact:
-        - INSERT into promo_click_tracking
-        - UPDATE promo_text_variations SET clicks = clicks + 1
-        - UPDATE promo_text_variations SET ctr = (clicks / impressions) * 100
+    Database Impact (batched, see click_writer):
+        - COPY into promo_click_tracking
+        - UPDATE promo_text_variations SET clicks = clicks + n
+        - UPDATE promo_offers SET total_clicks = total_clicks + n
+        - promo_text_variations.ctr follows (generated column, migration 004)
 
     Analytics Use Cases:
         - "Which text variation drives most clicks?"
@@ -2001,93 +2270,114 @@ async def track_click(
 
     Created: October 18, 2025
     """
-    try:
-        # STEP 1: Lookup offer_id from variation_id if not provided
-        # ----------------------------------------------------------
-        # WHY: Simplifies affiliate redirect handler (only needs variation_id)
-        # USE CASE: Redirect handler extracts promo_var from URL, doesn't know offer_id
-        offer_id = tracking.offer_id
-        if not offer_id:
-            # Query variation to get its offer_id
-            result = await database.fetchrow("""
-                SELECT offer_id FROM promo_text_variations
-                WHERE id = $1
-            """, tracking.variation_id)
-
-            if not result:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid variation_id: {tracking.variation_id}"
-                )
-
-            offer_id = result['offer_id']
-
-        # STEP 2: Hash IP address for privacy (if provided)
-        # --------------------------------------------------
-        # WHY: GDPR compliance - never store plain IP addresses
-        # USE CASE: Bot detection, click fraud prevention
-        ip_hash = None
-        if tracking.ip_address:
-            import hashlib
-            ip_hash = hashlib.sha256(tracking.ip_address.encode()).hexdigest()
-
-        # STEP 3: Insert click record into database
-        # ------------------------------------------
-        # WHY: Permanent record for analytics and self-learning
-        # DATABASE TRIGGER: Automatically increments variation.clicks counter
-        # PERFORMANCE: Single INSERT, ~10-20ms typical response time
-        await database.execute("""
-            INSERT INTO promo_click_tracking (
-                offer_id,
-                variation_id,
-                ip_hash,
-                user_agent,
-                referrer,
-                utm_source,
-                clicked_at,
-                clicked_date
-            ) VALUES ($1, $2, $3, $4, $5, $6, NOW(), CURRENT_DATE)
-        """, offer_id, tracking.variation_id, ip_hash,
-             tracking.user_agent, tracking.referrer, tracking.utm_source)
-
-        # STEP 3: Log successful tracking
-        # --------------------------------
-        # WHY: Debugging and monitoring
-        # EXAMPLE: "✅ Tracked click: offer=4, var=42, source=newsletter"
-        logger.info(
-            f"✅ Tracked click: "
-            f"offer={tracking.offer_id}, "
-            f"variation={tracking.variation_id}, "
-            f"source={tracking.utm_source or 'unknown'}"
-        )
-
-        # STEP 4: Return 204 No Content (fast, no response body)
-        # -------------------------------------------------------
-        # WHY 204? Standard for successful action with no data to return
-        # REDIRECT: User is already redirected (doesn't see this response)
-        return Response(status_code=204)
-
-    except HTTPException:
-        # Re-raise HTTP exceptions (validation errors)
-        raise
+    # STEP 1: Validate variation_id and lookup its offer_id
+    # ------------------------------------------------------
+    # WHY: Simplifies affiliate redirect handler (only needs variation_id),
+    #      and a bad id must fail this request, not the batched write
+    # USE CASE: Redirect handler extracts promo_var from URL, doesn't know offer_id
+    # CACHE: variation -> offer never changes, so repeat clicks skip the query
+    offer_id = await resolve_tracked_offer(database, tracking.variation_id, tracking.offer_id)
+
+    # STEP 2: Hash IP address for privacy (if provided)
+    # --------------------------------------------------
+    # WHY: GDPR compliance - never store plain IP addresses
+    # USE CASE: Bot detection, click fraud prevention
+    ip_hash = hash_ip(tracking.ip_address) if tracking.ip_address else None
+
+    # STEP 3: Queue click record for the next batch flush
+    # ----------------------------------------------------
+    # WHY: Permanent record for analytics and self-learning
+    # PERFORMANCE: Written by click_writer (COPY + counter bump per batch)
+    click_writer.add(
+        offer_id, tracking.variation_id, ip_hash, tracking.user_agent,
+        tracking.referrer, tracking.utm_source
+    )
 
-    except Exception as e:
-        # STEP 5: Error handling (log but don't fail redirect)
-        # -----------------------------------------------------
-        # WHY CRITICAL: User MUST be redirected even if tracking fails
-        # BEHAVIOR: Log error, return 500, but redirect already happened
-        logger.error(
-            f"❌ Failed to track click: "
-            f"offer={tracking.offer_id}, "
-            f"variation={tracking.variation_id}, "
-            f"error={str(e)}"
-        )
+    # STEP 3: Log successful tracking
+    # --------------------------------
+    # WHY: Debugging and monitoring
+    # EXAMPLE: "✅ Tracked click: offer=4, var=42, source=newsletter"
+    logger.info(
+        f"✅ Tracked click: "
+        f"offer={offer_id}, "
+        f"variation={tracking.variation_id}, "
+        f"source={tracking.utm_source or 'unknown'}"
+    )
 
-        # Return 500 but redirect already happened (async call)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to track click: {str(e)}"
-        )
+    # STEP 4: Return 204 No Content (fast, no response body)
+    # -------------------------------------------------------
+    # WHY 204? Standard for successful action with no data to return
+    # REDIRECT: User is already redirected (doesn't see this response)
+    return Response(status_code=204)
+
+
+# Offer + per-variation analytics + daily trends for one offer, one round trip
+# ($1 = offer_id, $2/$3 = date range). Returns no row if the offer is missing.
+# Ranking, totals and CTRs are computed here rather than in Python; the
+# variation and trend objects come back in the API response shape.
+ANALYTICS_SQL = """
+    SELECT
+        o.id,
+        o.name,
+        o.offer_type,
+        va.variations,
+        va.total_impressions,
+        va.total_clicks,
+        COALESCE(
+            ROUND(va.total_clicks * 100.0 / NULLIF(va.total_impressions, 0), 2), 0
+        ) AS overall_ctr,
+        (
+            SELECT COALESCE(jsonb_agg(t ORDER BY t.date DESC), '[]'::jsonb)
+            FROM (
+                SELECT
+                    COALESCE(i.date, c.date) as date,
+                    COALESCE(i.impressions, 0) as impressions,
+                    COALESCE(c.clicks, 0) as clicks,
+                    COALESCE(
+                        ROUND(COALESCE(c.clicks, 0) * 100.0 / NULLIF(i.impressions, 0), 2), 0
+                    ) as ctr
+                FROM (
+                    SELECT DATE(tracked_at) as date, COUNT(*) as impressions
+                    FROM promo_impression_tracking
+                    WHERE offer_id = $1
+                      AND tracked_at >= $2
+                      AND tracked_at <= $3
+                    GROUP BY DATE(tracked_at)
+                ) i
+                FULL OUTER JOIN (
+                    SELECT DATE(clicked_at) as date, COUNT(*) as clicks
+                    FROM promo_click_tracking
+                    WHERE offer_id = $1
+                      AND clicked_at >= $2
+                      AND clicked_at <= $3
+                    GROUP BY DATE(clicked_at)
+                ) c ON i.date = c.date
+            ) t
+        ) AS daily_trends
+    FROM promo_offers o
+    CROSS JOIN LATERAL (
+        SELECT
+            COALESCE(jsonb_agg(v ORDER BY v.performance_rank), '[]'::jsonb) AS variations,
+            COALESCE(SUM(v.impressions), 0)::BIGINT AS total_impressions,
+            COALESCE(SUM(v.clicks), 0)::BIGINT AS total_clicks
+        FROM (
+            SELECT
+                id as variation_id,
+                LEFT(text_content, 100) as text_preview,
+                tone,
+                length_category,
+                impressions,
+                clicks,
+                ctr,
+                ROW_NUMBER() OVER (ORDER BY ctr DESC) as performance_rank
+            FROM promo_text_variations
+            WHERE offer_id = o.id
+              AND approved = TRUE
+              AND impressions > 0  -- Only variations that have been shown
+        ) v
+    ) va
+    WHERE o.id = $1
+"""
 
 
 @app.get("/api/v1/promo/analytics/{offer_id}", response_model=AnalyticsResponse, tags=["Analytics"])
@@ -2192,199 +2482,79 @@ async def get_analytics(
 
     Performance:
         - Target: <500ms response time
-        - Database: Single query with JOIN
+        - Database: One query (offer, variations and trends in one round trip)
         - Caching: Consider Redis for frequently accessed analytics
 
     Created: October 18, 2025
     """
-    try:
-        # STEP 1: Validate days parameter (prevent excessive queries)
-        # ------------------------------------------------------------
-        # WHY: Prevent users from querying years of data (performance)
-        # LIMIT: Maximum 365 days (1 year of analytics)
-        if days < 1 or days > 365:
-            raise HTTPException(
-                status_code=400,
-                detail="Days parameter must be between 1 and 365"
-            )
-
-        # Calculate date range for analytics query
-        # -----------------------------------------
-        # WHY: Time-boxed queries are faster (indexed by date)
-        # EXAMPLE: Last 30 days = 2025-09-18 to 2025-10-18
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=days)
-
-        # STEP 2: Fetch offer details
-        # ----------------------------
-        # WHY: Need offer name and type for response context
-        # VALIDATION: Returns 404 if offer doesn't exist
-        offer = await database.fetchrow("""
-            SELECT id, name, offer_type
-            FROM promo_offers
-            WHERE id = $1
-        """, offer_id)
-
-        if not offer:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Offer {offer_id} not found"
-            )
-
-        # STEP 3: Fetch variation analytics with aggregated metrics
-        # -----------------------------------------------------------
-        # WHY: Need per-variation performance data for comparison
-        # QUERY OPTIMIZATION:
-        # - Uses denormalized counters (fast, no JOINs needed)
-        # - Filters to variations with impressions > 0 (active only)
-        # - Orders by CTR DESC (best performers first)
-        # PERFORMANCE: Typical query time <50ms for 10 variations
-        variations = await database.fetch("""
-            SELECT
-                id as variation_id,
-                LEFT(text_content, 100) as text_preview,
-                tone,
-                length_category,
-                impressions,
-                clicks,
-                ctr
-            FROM promo_text_variations
-            WHERE offer_id = $1
-              AND approved = TRUE
-              AND impressions > 0  -- Only variations that have been shown
-            ORDER BY ctr DESC  -- Best performers first
-        """, offer_id)
-
-        # STEP 4: Calculate aggregate metrics across all variations
-        # -----------------------------------------------------------
-        # WHY: Need overall offer performance (not just per-variation)
-        # CALCULATION: Sum all impressions and clicks, calculate overall CTR
-        total_impressions = sum(v["impressions"] for v in variations)
-        total_clicks = sum(v["clicks"] for v in variations)
-        overall_ctr = round(
-            (total_clicks / total_impressions * 100) if total_impressions > 0 else 0.0,
-            2
-        )
-
-        # STEP 5: Add performance ranking to each variation
-        # --------------------------------------------------
-        # WHY: Dashboard needs to show "Top Performer", "2nd Best", etc.
-        # RANKING: 1 = best CTR, 2 = second best, etc.
-        # TIE HANDLING: If CTRs equal, maintain database order
-        variation_analytics = []
-        for rank, variation in enumerate(variations, start=1):
-            variation_analytics.append({
-                "variation_id": variation["variation_id"],
-                "text_preview": variation["text_preview"],
-                "tone": variation["tone"],
-                "length_category": variation["length_category"],
-                "impressions": variation["impressions"],
-                "clicks": variation["clicks"],
-                "ctr": float(variation["ctr"]),  # Convert Decimal to float
-                "performance_rank": rank
-            })
-
-        # STEP 6: Query daily trends for time-series visualization
-        # ----------------------------------------------------------
-        # WHY: Dashboard needs trend charts showing performance over time
-        # QUERY: Join impressions and clicks, group by date
-        daily_trends_data = await database.fetch("""
-            SELECT
-                COALESCE(i.date, c.date) as date,
-                COALESCE(i.impressions, 0) as impressions,
-                COALESCE(c.clicks, 0) as clicks
-            FROM (
-                SELECT DATE(tracked_at) as date, COUNT(*) as impressions
-                FROM promo_impression_tracking
-                WHERE offer_id = $1
-                  AND tracked_at >= $2
-                  AND tracked_at <= $3
-                GROUP BY DATE(tracked_at)
-            ) i
-            FULL OUTER JOIN (
-                SELECT DATE(clicked_at) as date, COUNT(*) as clicks
-                FROM promo_click_tracking
-                WHERE offer_id = $1
-                  AND clicked_at >= $2
-                  AND clicked_at <= $3
-                GROUP BY DATE(clicked_at)
-            ) c ON i.date = c.date
-            ORDER BY date DESC
-        """, offer_id, start_date, end_date)
-
-        # Build daily trends array
-        daily_trends = []
-        for row in daily_trends_data:
-            clicks = row["clicks"] or 0
-            impressions = row["impressions"] or 0
-            ctr = round((clicks / impressions * 100) if impressions > 0 else 0.0, 2)
-            daily_trends.append({
-                "date": row["date"].isoformat(),
-                "impressions": impressions,
-                "clicks": clicks,
-                "ctr": ctr
-            })
-
-        # STEP 7: Build and return analytics response
-        # --------------------------------------------
-        # WHY: Structured response model for consistent API
-        # VALIDATION: Pydantic validates response structure
-        logger.info(
-            f"📊 Analytics retrieved: "
-            f"offer={offer_id}, "
-            f"variations={len(variation_analytics)}, "
-            f"total_impressions={total_impressions}, "
-            f"overall_ctr={overall_ctr}%"
+    # STEP 1: Validate days parameter (prevent excessive queries)
+    # ------------------------------------------------------------
+    # WHY: Prevent users from querying years of data (performance)
+    # LIMIT: Maximum 365 days (1 year of analytics)
+    if days < 1 or days > 365:
+        raise HTTPException(
+            status_code=400,
+            detail="Days parameter must be between 1 and 365"
         )
 
-        return AnalyticsResponse(
-            total_impressions=total_impressions,
-            total_clicks=total_clicks,
-            overall_ctr=overall_ctr,
-            offers=[
-                {
-                    "offer_id": offer_id,
-                    "offer_name": offer["name"],
-                    "impressions": total_impressions,
-                    "clicks": total_clicks,
-                    "ctr": overall_ctr,
-                    "variations": [
-                        {
-                            "variation_id": v["variation_id"],
-                            "text_preview": v["text_preview"],
-                            "tone": v["tone"],
-                            "length_category": v["length_category"],
-                            "impressions": v["impressions"],
-                            "clicks": v["clicks"],
-                            "ctr": v["ctr"],
-                            "performance_rank": v["performance_rank"]
-                        }
-                        for v in variation_analytics
-                    ]
-                }
-            ],
-            daily_trends=daily_trends
+    # Calculate date range for analytics query
+    # -----------------------------------------
+    # WHY: Time-boxed queries are faster (indexed by date)
+    # EXAMPLE: Last 30 days = 2025-09-18 to 2025-10-18
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=days)
+
+    # STEP 2: Fetch offer, variation analytics and daily trends in one query
+    # -----------------------------------------------------------------------
+    # WHY: One round trip instead of an offer lookup followed by two more
+    # QUERY: Variations and trends are aggregated to jsonb arrays (decoded by
+    #        the pool's jsonb codec); no row at all means the offer doesn't exist
+    # - Variations use denormalized counters (fast, no JOINs needed), only
+    #   those shown at least once, ranked by CTR (1 = best, ties keep
+    #   database order) - rows are already in the response shape
+    # - Totals, overall CTR and per-day CTR are computed by Postgres too
+    # - Trends join per-day impressions and clicks, newest first
+    analytics = await database.fetchrow(ANALYTICS_SQL, offer_id, start_date, end_date,
+                                        timeout=ANALYTICS_QUERY_TIMEOUT)
+
+    if not analytics:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Offer {offer_id} not found"
         )
 
-    except HTTPException:
-        # Re-raise HTTP exceptions (401, 404, 400)
-        raise
-
-    except Exception as e:
-        # STEP 7: Error handling
-        # -----------------------
-        # WHY: Log failures for debugging
-        # BEHAVIOR: Return 500 with error details
-        logger.error(
-            f"❌ Failed to retrieve analytics: "
-            f"offer={offer_id}, "
-            f"error={str(e)}"
-        )
+    # STEP 3: Aggregate metrics across all variations (from the query)
+    # ------------------------------------------------------------------
+    total_impressions = analytics["total_impressions"]
+    total_clicks = analytics["total_clicks"]
+    overall_ctr = float(analytics["overall_ctr"])  # Convert Decimal to float
+    variations = analytics["variations"]
+
+    # STEP 4: Build and return analytics response
+    # --------------------------------------------
+    # WHY: Structured response model for consistent API
+    # VALIDATION: Pydantic validates response structure
+    logger.info(
+        "📊 Analytics retrieved: offer=%s, variations=%d, total_impressions=%s, overall_ctr=%s%%",
+        offer_id, len(variations), total_impressions, overall_ctr
+    )
 
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to retrieve analytics: {str(e)}"
-        )
+    return AnalyticsResponse(
+        total_impressions=total_impressions,
+        total_clicks=total_clicks,
+        overall_ctr=overall_ctr,
+        offers=[
+            {
+                "offer_id": offer_id,
+                "offer_name": analytics["name"],
+                "impressions": total_impressions,
+                "clicks": total_clicks,
+                "ctr": overall_ctr,
+                "variations": variations
+            }
+        ],
+        daily_trends=analytics["daily_trends"]
+    )
 
 
 # ============================================================================
@@ -2411,26 +2581,35 @@ async def root(request: Request):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.detail,
             "status_code": exc.status_code
-        }
+        },
+        headers=exc.headers  # e.g. WWW-Authenticate, Retry-After
+    )
+
+
+@app.exception_handler(OllamaOverloadedError)
+async def ollama_overloaded_handler(request, exc):
+    """Generation capacity full: tell the client to retry instead of queueing"""
+    return ORJSONResponse(
+        status_code=503,
+        content={"error": str(exc), "status_code": 503},
+        headers={"Retry-After": "30"}
     )
 
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
-    """General exception handler"""
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-    return JSONResponse(
-        status_code=500,
-        content={
-            "error": "Internal server error",
-            "detail": str(exc) if settings.DEBUG else "An error occurred"
-        }
-    )
+    """
+    Last-resort handler for errors outside UnhandledErrorMiddleware
+
+    Endpoint errors are answered by UnhandledErrorMiddleware (inside CORS);
+    this only sees failures in the outer middleware itself.
+    """
+    return internal_error_response(request, exc)
 
 
 # ============================================================================
@@ -2439,9 +2618,20 @@ async def general_exception_handler(request, exc):
 
 if __name__ == "__main__":
     import uvicorn
+    from app.config import load_env_once
+
+    # Parse .env once here; reload/worker processes inherit the environment
+    # (and the APP_ENV_LOADED flag) instead of re-reading the file
+    load_env_once()
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        # libuv event loop: asyncpg's socket traffic is loop-bound. Explicit
+        # so a missing uvloop fails at startup instead of silently falling
+        # back to the slower asyncio loop ("auto").
+        loop="uvloop",
+        # C HTTP/1.1 parser (llhttp); explicit for the same reason as loop
+        http="httptools"
     )
@@ -645,9 +645,17 @@ class OfferListResponse(BaseModel):
             ],
             "total": 45
         }
+
+    Keyset Pagination (/api/v1/offers?limit=N):
+        - offers holds at most `limit` rows and total counts the rows on
+          this page (no COUNT(*) query)
+        - next_cursor is an opaque token for the following page
+          (?limit=N&cursor=...), None on the last page
+        - Without `limit` all offers are returned and next_cursor is None
     """
     offers: List[OfferResponse]
     total: int
+    next_cursor: Optional[str] = None
 
 
 # ============================================================================
@@ -1388,7 +1396,7 @@ class GenerationJobResponse(BaseModel):
 #
 # PRIVACY & GDPR:
 # - No PII stored (no user_id, no email addresses)
-# - IP addresses hashed before storage (SHA-256)
+# - IP addresses hashed before storage (BLAKE2b)
 # - Cookie-less tracking (server-side only)
 # - Aggregate data only in analytics
 # - Right to be forgotten: CASCADE DELETE on offer/variation deletion
@@ -1420,7 +1428,7 @@ class ImpressionTrackingRequest(BaseModel):
     7. Newsletter sends to subscribers
 
     PRIVACY NOTES:
-    - ip_address is OPTIONAL and will be SHA-256 hashed before storage
+    - ip_address is OPTIONAL and will be BLAKE2b hashed before storage
     - No user identification - only aggregate tracking
     - GDPR compliant - no PII required
 
@@ -1459,7 +1467,7 @@ class ImpressionTrackingRequest(BaseModel):
     Database Impact:
         - INSERT into promo_impression_tracking
         - UPDATE promo_text_variations SET impressions = impressions + 1
-        - UPDATE promo_text_variations SET ctr = (clicks / impressions) * 100
+        - promo_text_variations.ctr follows (generated column, migration 004)
 
     Created: October 18, 2025
     """
@@ -1514,12 +1522,12 @@ class ImpressionTrackingRequest(BaseModel):
 
     # IP address of newsletter send server (will be hashed)
     # WHY USEFUL: Detect bot traffic, prevent fraud
-    # PRIVACY: SHA-256 hashed before storage (one-way, can't reverse)
+    # PRIVACY: BLAKE2b hashed before storage (one-way, can't reverse)
     # OPTIONAL: Newsletter may not have access to IP
     # NOTE: This is server IP, NOT subscriber IP (we don't track individuals)
     ip_address: Optional[str] = Field(
         None,
-        description="IP address of request (will be SHA-256 hashed for privacy)",
+        description="IP address of request (will be BLAKE2b hashed for privacy)",
         example="192.168.1.1",
         max_length=45  # IPv4 = 15 chars, IPv6 = 45 chars
     )
@@ -1551,7 +1559,7 @@ class ClickTrackingRequest(BaseModel):
     - Tracking happens in background
 
     PRIVACY NOTES:
-    - ip_address is OPTIONAL and will be SHA-256 hashed before storage
+    - ip_address is OPTIONAL and will be BLAKE2b hashed before storage
     - user_agent helps detect mobile vs desktop (no user identification)
     - referrer shows email client type (not individual user)
     - No click-through tracking (we don't track what happens after redirect)
@@ -1594,7 +1602,7 @@ class ClickTrackingRequest(BaseModel):
     Database Impact:
         - INSERT into promo_click_tracking
         - UPDATE promo_text_variations SET clicks = clicks + 1
-        - UPDATE promo_text_variations SET ctr = (clicks / impressions) * 100
+        - promo_text_variations.ctr follows (generated column, migration 004)
 
     Created: October 18, 2025
     """
@@ -1628,11 +1636,11 @@ class ClickTrackingRequest(BaseModel):
 
     # IP address of user who clicked (will be hashed)
     # WHY USEFUL: Detect bot traffic, prevent click fraud
-    # PRIVACY: SHA-256 hashed before storage
+    # PRIVACY: BLAKE2b hashed before storage
     # USE CASE: "Filter out bot clicks from analytics"
     ip_address: Optional[str] = Field(
         None,
-        description="IP address of user who clicked (will be SHA-256 hashed for privacy)",
+        description="IP address of user who clicked (will be BLAKE2b hashed for privacy)",
         example="192.168.1.1",
         max_length=45
     )
@@ -8,6 +8,7 @@ Designed for high reliability with circuit breaker pattern, exponential backoff,
 Architecture:
     - Ollama Python Client for API communication
     - Circuit breaker pattern for fault tolerance
+    - Adaptive (AIMD) concurrency limit on in-flight generations
     - Exponential backoff retry logic for transient failures
     - Custom exception classes for error handling
     - Comprehensive logging for debugging
@@ -50,10 +51,13 @@ Updated: October 17, 2025 - Production-ready with circuit breaker and retry logi
 import logging
 import asyncio
 import time
-from typing import List, Dict, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, List, Dict, Optional
 from enum import Enum
-from ollama import Client
-from app.config import settings
+import httpx
+from ollama import AsyncClient
+from app.config import OLLAMA_MAX_TOKENS, OLLAMA_MODEL, OLLAMA_TEMPERATURE, settings
 
 logger = logging.getLogger(__name__)
 
@@ -148,6 +152,21 @@ class OllamaCircuitBreakerError(OllamaAPIError):
     pass
 
 
+class OllamaOverloadedError(OllamaAPIError):
+    """
+    Raised when too many generations are already running or queued
+
+    The AdaptiveConcurrencyLimiter caps concurrent Ollama calls and the
+    number of callers waiting for a slot. A request beyond that is rejected
+    immediately instead of piling up behind 10-30 second generations.
+
+    Recommended Action:
+        - Return 503 with Retry-After to the client
+        - Retry after a short delay
+    """
+    pass
+
+
 class OllamaJSONParseError(OllamaAPIError):
     """
     Raised when API response cannot be parsed as valid JSON
@@ -379,6 +398,132 @@ class CircuitBreaker:
         return False
 
 
+# =============================================================================
+# Adaptive Concurrency Limit (AIMD)
+# =============================================================================
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Caps concurrent Ollama generations with an AIMD-adjusted limit
+
+    Purpose:
+        Generations take 10-30 seconds. Without a cap, a burst of requests
+        all hit Ollama at once, every one gets slower, and callers time out
+        together. The circuit breaker only reacts after failures; this
+        limiter reacts to rising latency first.
+
+    How it works (additive increase, multiplicative decrease):
+        1. At most int(limit) generations run at once; up to max_queue more
+           wait for a slot, anything beyond that raises OllamaOverloadedError
+        2. Each finished call records its latency in a sliding window
+        3. Window average <= latency_target: limit += 1/limit (about +1
+           per `limit` healthy calls)
+        4. Window average > latency_target: limit *= 0.9
+        5. Ollama error or timeout: limit *= 0.5
+        limit always stays within [min_limit, max_limit]
+
+    Thread Safety:
+        asyncio only, per worker process (like CircuitBreaker).
+
+    Example:
+        async with ollama_concurrency.slot():
+            result = await call_ollama()
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        latency_target: float = 30.0,
+        max_queue: int = 8,
+        window: int = 20
+    ):
+        """
+        Initialize limiter
+
+        Args:
+            initial_limit: Concurrent generations allowed at startup
+            min_limit / max_limit: Bounds for the adjusted limit
+            latency_target: Seconds; slower window average shrinks the limit
+            max_queue: Callers allowed to wait for a slot
+            window: Number of recent latencies averaged
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.max_queue = max_queue
+
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._in_flight = 0
+        self._waiting = 0
+        self._cond = asyncio.Condition()
+
+    def _has_slot(self) -> bool:
+        return self._in_flight < int(self.limit)
+
+    def _record_success(self, latency: float) -> None:
+        self._latencies.append(latency)
+        average = sum(self._latencies) / len(self._latencies)
+        if average <= self.latency_target:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        else:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+            logger.warning(
+                "⚠️ Ollama latency %.1fs above target %.1fs - concurrency limit now %.1f",
+                average, self.latency_target, self.limit
+            )
+
+    def _record_failure(self) -> None:
+        self.limit = max(self.min_limit, self.limit * 0.5)
+        logger.warning("⚠️ Ollama call failed - concurrency limit now %.1f", self.limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold one generation slot for the duration of the block
+
+        Raises:
+            OllamaOverloadedError: No free slot and the wait queue is full
+        """
+        async with self._cond:
+            if not self._has_slot() and self._waiting >= self.max_queue:
+                raise OllamaOverloadedError(
+                    f"Text generation is at capacity ({self._in_flight} running, "
+                    f"{self._waiting} queued). Please try again shortly."
+                )
+            self._waiting += 1
+            try:
+                await self._cond.wait_for(self._has_slot)
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+
+        started = time.monotonic()
+        succeeded = False
+        failed = False
+        try:
+            yield
+            succeeded = True
+        except (OllamaAPIError, asyncio.TimeoutError):
+            failed = True
+            raise
+        finally:
+            async with self._cond:
+                self._in_flight -= 1
+                if succeeded:
+                    self._record_success(time.monotonic() - started)
+                elif failed:
+                    self._record_failure()
+                # The limit may have grown: wake every waiter to re-check
+                self._cond.notify_all()
+
+
+# Shared by every OllamaService instance in this worker process
+ollama_concurrency = AdaptiveConcurrencyLimiter()
+
+
 # =============================================================================
 # Ollama Service Class
 # =============================================================================
@@ -416,7 +561,7 @@ class OllamaService:
         # ]
 
     Configuration:
-        All settings loaded from app.config.settings:
+        Loaded from app.config (settings and boot-time constants):
             - OLLAMA_API_KEY: Authentication token
             - OLLAMA_API_URL: API endpoint (https://ollama.com)
             - OLLAMA_MODEL: Model identifier (gpt-oss:120b-cloud)
@@ -446,20 +591,22 @@ class OllamaService:
             ValueError: If OLLAMA_API_KEY is not configured
 
         Side Effects:
-            - Creates Ollama client connection
+            - Creates Ollama client connection pool (closed by close())
             - Initializes circuit breaker
             - Logs initialization status
         """
         if not settings.OLLAMA_API_KEY:
             raise ValueError("OLLAMA_API_KEY environment variable is required")
 
-        # Initialize Ollama client
-        self.client = Client(
+        # Initialize Ollama client (async, one keep-alive connection pool per
+        # instance - share the instance so TCP+TLS handshakes are reused)
+        self.client = AsyncClient(
             host=settings.OLLAMA_API_URL,
-            headers={'Authorization': settings.OLLAMA_API_KEY}
+            headers={'Authorization': settings.OLLAMA_API_KEY},
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
         )
 
-        self.model = settings.OLLAMA_MODEL
+        self.model = OLLAMA_MODEL
 
         # Initialize circuit breaker
         # Opens after 5 failures, waits 60s before retry, needs 2 successes to close
@@ -472,10 +619,18 @@ class OllamaService:
         logger.info(
             f"✅ Ollama service initialized: "
             f"model={self.model}, "
-            f"temperature={settings.OLLAMA_TEMPERATURE}, "
-            f"max_tokens={settings.OLLAMA_MAX_TOKENS}"
+            f"temperature={OLLAMA_TEMPERATURE}, "
+            f"max_tokens={OLLAMA_MAX_TOKENS}"
         )
 
+    async def close(self) -> None:
+        """
+        Close the client's HTTP connection pool (call once at shutdown)
+        """
+        # ollama's AsyncClient has no public close; it wraps an httpx.AsyncClient
+        await self.client._client.aclose()
+        logger.info("Ollama service closed")
+
     async def _retry_with_backoff(self, func, *args, **kwargs):
         """
         Execute function with exponential backoff retry logic
@@ -779,11 +934,13 @@ Generate exactly {num_variations} variations."""
         # ==================================================================
 
         try:
-            result = await self._retry_with_backoff(
-                self._generate_text_internal,
-                system_prompt=system_prompt,
-                num_variations=num_variations
-            )
+            # Adaptive concurrency cap (raises OllamaOverloadedError when full)
+            async with ollama_concurrency.slot():
+                result = await self._retry_with_backoff(
+                    self._generate_text_internal,
+                    system_prompt=system_prompt,
+                    num_variations=num_variations
+                )
 
             # Success - update circuit breaker
             self.circuit_breaker.record_success()
@@ -791,6 +948,10 @@ Generate exactly {num_variations} variations."""
             logger.info(f"✅ Generated {len(result)} text variations successfully")
             return result
 
+        except OllamaOverloadedError:
+            # Rejected before any API call - not an Ollama failure
+            raise
+
         except Exception as e:
             # Failure - update circuit breaker
             self.circuit_breaker.record_failure()
@@ -828,7 +989,7 @@ Generate exactly {num_variations} variations."""
             logger.info(f"🎨 Calling Ollama API ({self.model}) for {num_variations} variations")
 
             # Call Ollama API using Python client
-            response = self.client.chat(
+            response = await self.client.chat(
                 model=self.model,
                 messages=[
                     {
@@ -842,8 +1003,8 @@ Generate exactly {num_variations} variations."""
                 ],
                 stream=False,
                 options={
-                    "temperature": settings.OLLAMA_TEMPERATURE,
-                    "num_predict": settings.OLLAMA_MAX_TOKENS * num_variations
+                    "temperature": OLLAMA_TEMPERATURE,
+                    "num_predict": OLLAMA_MAX_TOKENS * num_variations
                 },
                 format="json"  # Force JSON output
             )
@@ -0,0 +1,25 @@
+-- ============================================================================
+-- Migration 001: Covering index for auth lookups on promo_users
+-- ============================================================================
+--
+-- Both auth queries in app/auth.py filter on:
+--     WHERE email = $1 AND is_active = TRUE
+--
+-- get_current_user runs on every authenticated request and authenticate_user
+-- runs on every login. This partial index turns both into a single index
+-- probe, and the INCLUDE list lets the login query (id, name, role,
+-- password_hash) be answered from the index alone.
+--
+-- CONCURRENTLY avoids locking promo_users for writes while the index builds.
+-- It cannot run inside a transaction block, so run this file with plain psql:
+--
+--     psql "$DATABASE_URL" -f migrations/001_promo_users_email_active_idx.sql
+--
+-- Requires PostgreSQL 11+ (INCLUDE clause).
+-- Created: October 2025
+-- ============================================================================
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS promo_users_email_active_idx
+    ON promo_users (email)
+    INCLUDE (id, name, role, password_hash)
+    WHERE is_active = TRUE;
@@ -0,0 +1,37 @@
+-- ============================================================================
+-- Migration 002: Partial indexes for newsletter offer selection
+-- ============================================================================
+--
+-- The eligible-offers query (ELIGIBLE_OFFERS_SQL) and the health check
+-- (HEALTH_SQL) in app/main.py both filter on:
+--     o.status = 'active' AND start_date/end_date around NOW()
+--     EXISTS (... t.offer_id = o.id AND t.approved = TRUE)
+--
+-- promo_offers_active_dates_idx only holds active offers, and its INCLUDE
+-- list covers every column the selection query returns, so the offer side
+-- is answered from the index alone.
+--
+-- promo_variations_approved_offer_idx only holds approved variations. It
+-- serves the EXISTS probe and the ARRAY(SELECT t.id ...) variation id list.
+-- text_content/cta_text are deliberately NOT included: long promo texts
+-- would bloat the index and can exceed the btree row size limit, failing
+-- inserts. The per-request text fetch is a primary-key lookup anyway.
+--
+-- CONCURRENTLY avoids locking the tables for writes while the indexes build.
+-- It cannot run inside a transaction block, so run this file with plain psql:
+--
+--     psql "$DATABASE_URL" -f migrations/002_promo_selection_partial_idx.sql
+--
+-- Requires PostgreSQL 11+ (INCLUDE clause).
+-- Created: October 2025
+-- ============================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS promo_offers_active_dates_idx
+    ON promo_offers (start_date, end_date)
+    INCLUDE (id, name, offer_type, affiliate_slug, weight, destination_url)
+    WHERE status = 'active';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS promo_variations_approved_offer_idx
+    ON promo_text_variations (offer_id)
+    INCLUDE (id)
+    WHERE approved = TRUE;
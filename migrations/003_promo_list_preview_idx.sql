@@ -0,0 +1,30 @@
+-- ============================================================================
+-- Migration 003: Sorted indexes for offer listing and newsletter preview
+-- ============================================================================
+--
+-- list_offers with a status filter (LIST_OFFERS_BY_STATUS_SQL in app/main.py):
+--     WHERE status = $1 ORDER BY priority DESC, created_at DESC
+-- idx_offers_status_pri_created returns the rows already in that order, so
+-- the plan has no Sort node.
+--
+-- preview_newsletter without text_id picks the oldest approved variation:
+--     WHERE offer_id = $1 AND approved = TRUE ORDER BY created_at ASC LIMIT 1
+-- idx_text_offer_approved_created (partial, approved rows only) turns that
+-- into a single index probe plus one heap fetch for the text columns.
+--
+-- Verify with EXPLAIN (ANALYZE, BUFFERS) that neither query sorts.
+--
+-- CONCURRENTLY avoids locking the tables for writes while the indexes build.
+-- It cannot run inside a transaction block, so run this file with plain psql:
+--
+--     psql "$DATABASE_URL" -f migrations/003_promo_list_preview_idx.sql
+--
+-- Created: October 2025
+-- ============================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_offers_status_pri_created
+    ON promo_offers (status, priority DESC, created_at DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_text_offer_approved_created
+    ON promo_text_variations (offer_id, created_at)
+    WHERE approved = TRUE;
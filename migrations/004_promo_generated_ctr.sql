@@ -0,0 +1,61 @@
+-- ============================================================================
+-- Migration 004: Stored generated CTR columns + covering offer list index
+-- ============================================================================
+--
+-- ctr on promo_offers and promo_text_variations was kept up to date by the
+-- BEFORE INSERT OR UPDATE triggers update_offer_ctr / update_variation_ctr
+-- (see TRACKING_SYSTEM_DESIGN.md), so every counter bump also ran a plpgsql
+-- function. The column becomes GENERATED ALWAYS ... STORED instead. Postgres
+-- computes it when the row is written, and reads see a plain column value.
+--
+-- Same scale and semantics as before, so the API output is unchanged:
+-- a percentage rounded to 2 places in DECIMAL(5,2), and NULL until the first
+-- impression.
+--
+-- idx_offers_status_pri_created_cover replaces idx_offers_status_pri_created
+-- from migration 003:
+--   - The key gains id DESC, which is the keyset tie-breaker in
+--     LIST_OFFERS_*_SQL (app/main.py). The full ORDER BY then comes straight
+--     from the index.
+--   - INCLUDE (ctr, total_impressions, total_clicks) lets stats-only reads
+--     over the same ordering run as Index-Only Scans.
+--
+-- The ALTER TABLE part rewrites both tables under an ACCESS EXCLUSIVE lock.
+-- Run it in a quiet window. Both tables are small, so the rewrite takes
+-- seconds. The index part uses CONCURRENTLY, which cannot run inside a
+-- transaction block, so run this file with plain psql (no -1):
+--
+--     psql "$DATABASE_URL" -f migrations/004_promo_generated_ctr.sql
+--
+-- Run VACUUM (ANALYZE) on promo_offers afterwards. Index-Only Scans need
+-- the visibility map to be current.
+--
+-- Created: October 2025
+-- ============================================================================
+
+BEGIN;
+
+DROP TRIGGER IF EXISTS trigger_update_offer_ctr ON promo_offers;
+DROP TRIGGER IF EXISTS trigger_update_variation_ctr ON promo_text_variations;
+DROP FUNCTION IF EXISTS update_offer_ctr();
+DROP FUNCTION IF EXISTS update_variation_ctr();
+
+ALTER TABLE promo_offers
+    DROP COLUMN IF EXISTS ctr,
+    ADD COLUMN ctr DECIMAL(5,2) GENERATED ALWAYS AS (
+        ROUND(total_clicks * 100.0 / NULLIF(total_impressions, 0), 2)
+    ) STORED;
+
+ALTER TABLE promo_text_variations
+    DROP COLUMN IF EXISTS ctr,
+    ADD COLUMN ctr DECIMAL(5,2) GENERATED ALWAYS AS (
+        ROUND(clicks * 100.0 / NULLIF(impressions, 0), 2)
+    ) STORED;
+
+COMMIT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_offers_status_pri_created_cover
+    ON promo_offers (status, priority DESC, created_at DESC, id DESC)
+    INCLUDE (ctr, total_impressions, total_clicks);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_offers_status_pri_created;
@@ -0,0 +1,45 @@
+-- ============================================================================
+-- Migration 005: Move tracking counter increments from triggers to the app
+-- ============================================================================
+--
+-- track-impression / track-click no longer INSERT one row per request. Rows
+-- are buffered per worker and loaded with one COPY per batch (impression_writer
+-- / click_writer in app/main.py). The same transaction then bumps
+--     promo_text_variations.impressions / clicks
+--     promo_offers.total_impressions / total_clicks
+-- once per variation/offer (unnest ... GROUP BY).
+--
+-- The row-level AFTER INSERT triggers on the tracking tables did those
+-- increments one row at a time. Left in place, they would double count. This
+-- migration drops every user-defined trigger on the two tracking tables.
+-- Check the list first; nothing else should be attached to them:
+--
+--     SELECT tgrelid::regclass, tgname FROM pg_trigger
+--     WHERE tgrelid IN ('promo_impression_tracking'::regclass,
+--                       'promo_click_tracking'::regclass)
+--       AND NOT tgisinternal;
+--
+-- Deploy this migration together with the application change. Between the
+-- two, counters are either double counted (new app, old triggers) or not
+-- counted (old app, no triggers).
+--
+--     psql "$DATABASE_URL" -1 -f migrations/005_promo_tracking_batch_counters.sql
+--
+-- Created: October 2025
+-- ============================================================================
+
+DO $$
+DECLARE
+    trg RECORD;
+BEGIN
+    FOR trg IN
+        SELECT tgrelid::regclass AS tbl, tgname
+        FROM pg_trigger
+        WHERE tgrelid IN ('promo_impression_tracking'::regclass,
+                          'promo_click_tracking'::regclass)
+          AND NOT tgisinternal
+    LOOP
+        EXECUTE format('DROP TRIGGER %I ON %s', trg.tgname, trg.tbl);
+        RAISE NOTICE 'Dropped trigger % on %', trg.tgname, trg.tbl;
+    END LOOP;
+END $$;
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- Migration 006: NOT NULL on promo_offers.priority / created_at
+-- ============================================================================
+--
+-- The offer list is keyset-paginated on (priority, created_at, id). See
+-- LIST_OFFERS_*_SQL and encode_offer_cursor in app/main.py. That only works
+-- when the three columns are never NULL:
+--   - The row-value comparison (priority, created_at, id) < ($1, $2, $3) is
+--     NULL for a NULL column, so the row would never show up on a later page.
+--   - The cursor encoder calls created_at.isoformat(), which fails on None.
+--
+-- The app already writes both columns on every insert: priority from
+-- OfferCreate (default 0) and created_at as NOW(). The offer update keeps
+-- the current priority when none is sent. This migration makes the schema
+-- guarantee it. Any legacy NULLs are backfilled first, with the same values
+-- the app would have written.
+--
+-- SET NOT NULL scans the table under an ACCESS EXCLUSIVE lock. promo_offers
+-- is small, so it takes well under a second.
+--
+--     psql "$DATABASE_URL" -1 -f migrations/006_promo_offers_order_not_null.sql
+--
+-- Created: October 2025
+-- ============================================================================
+
+UPDATE promo_offers SET priority = 0 WHERE priority IS NULL;
+UPDATE promo_offers SET created_at = COALESCE(updated_at, NOW()) WHERE created_at IS NULL;
+
+ALTER TABLE promo_offers
+    ALTER COLUMN priority SET DEFAULT 0,
+    ALTER COLUMN priority SET NOT NULL,
+    ALTER COLUMN created_at SET DEFAULT NOW(),
+    ALTER COLUMN created_at SET NOT NULL;